@@ -1,45 +1,131 @@
+import time
+
+# Startup timing starts before the Kivy imports
+STARTUP_START = time.perf_counter()
+
+import logging
+import os
+import queue
+import threading
+
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
-from kivy.uix.gridlayout import GridLayout
 from kivy.uix.button import Button
 from kivy.uix.label import Label
-from kivy.uix.popup import Popup
 from kivy.uix.screenmanager import ScreenManager, Screen
 from kivy.clock import Clock
-from kivy.uix.switch import Switch
-from kivy.uix.scrollview import ScrollView
-from kivy.core.audio import SoundLoader
+from kivy.uix.widget import Widget
+from kivy.graphics import Color, InstructionGroup, Line, Rectangle
 from kivy.core.window import Window
 from kivy.utils import platform
-import random
 
-# Mobile-specific imports
-if platform == 'android':
-    try:
-        from jnius import autoclass, PythonJavaClass
-        from android.permissions import request_permissions, Permission
-        
-        # Request vibration permission
-        request_permissions([Permission.VIBRATE])
-        
-        # Get vibrator service
-        PythonActivity = autoclass('org.kivy.android.PythonActivity')
-        Context = autoclass('android.content.Context')
-        activity = PythonActivity.mActivity
-        vibrator = activity.getSystemService(Context.VIBRATOR_SERVICE)
-    except ImportError:
-        vibrator = None
-        print("Android vibration not available")
-else:
-    vibrator = None
+import ai_stats
+import game_ai
+import profiling
+import savegame
+import stats_store
+from ai_worker import AIWorker
+from game_engine import BOARD_PRESETS, Board
+
+# Popup, Switch, ScrollView and the ultimate module are imported where
+# first used, and secondary screens are built on first visit, to keep
+# them out of the time to first frame.
+
+class StartupTimer:
+    """Milestones since STARTUP_START, logged once the first frame is shown"""
+    
+    def __init__(self, start):
+        self.start = start
+        self.marks = []
+        self.log = logging.getLogger("tictactoe.startup")
+        
+    def mark(self, name):
+        self.marks.append((name, 1000 * (time.perf_counter() - self.start)))
+        
+    def report(self):
+        text = ", ".join(f"{name} {ms:.0f} ms" for name, ms in self.marks)
+        self.log.info("Startup timing: %s", text)
+        return text
+
+startup_timer = StartupTimer(STARTUP_START)
+startup_timer.mark("imports")
+
+# The Android vibrator service is looked up, and permission requested, on the
+# haptics thread the first time it vibrates
+_vibrator = None
+_vibrator_checked = False
+
+def get_vibrator():
+    """Return the Android vibrator service, or None off Android"""
+    global _vibrator, _vibrator_checked
+    if not _vibrator_checked:
+        _vibrator_checked = True
+        if platform == 'android':
+            try:
+                from jnius import autoclass
+                from android.permissions import request_permissions, Permission
+                
+                # Request vibration permission
+                request_permissions([Permission.VIBRATE])
+                
+                # Get vibrator service
+                PythonActivity = autoclass('org.kivy.android.PythonActivity')
+                Context = autoclass('android.content.Context')
+                activity = PythonActivity.mActivity
+                _vibrator = activity.getSystemService(Context.VIBRATOR_SERVICE)
+            except ImportError:
+                print("Android vibration not available")
+    return _vibrator
+
+class HapticsDispatcher:
+    """Sends vibrations from a background thread so jnius calls never block the UI.
+    
+    Requests that arrive within MERGE_WINDOW of each other, such as the move
+    and game-over buzzes of one frame, become a single vibration as long as
+    the longest of them.
+    """
+    
+    MERGE_WINDOW = 0.04
+    
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        
+    def vibrate(self, duration):
+        if self.thread is None:
+            with self.lock:
+                if self.thread is None:
+                    self.thread = threading.Thread(target=self.run, name="haptics",
+                                                   daemon=True)
+                    self.thread.start()
+        self.requests.put(duration)
+        
+    def run(self):
+        while True:
+            duration = self.requests.get()
+            deadline = time.monotonic() + self.MERGE_WINDOW
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    duration = max(duration, self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                vibrator = get_vibrator()
+                if vibrator:
+                    vibrator.vibrate(duration)
+            except Exception as e:
+                print(f"Vibration failed: {e}")
+
+haptics = HapticsDispatcher()
 
 def vibrate(duration=50):
-    """Add haptic feedback"""
-    try:
-        if platform == 'android' and vibrator:
-            vibrator.vibrate(duration)
-    except Exception as e:
-        print(f"Vibration failed: {e}")
+    """Add haptic feedback; returns at once and does nothing off Android"""
+    if platform == 'android':
+        haptics.vibrate(duration)
 
 class MainMenuScreen(Screen):
     def __init__(self, game_logic, **kwargs):
@@ -102,11 +188,17 @@ class MainMenuScreen(Screen):
         self.add_widget(layout)
         
     def get_score_text(self):
-        return f'[color=bdc3c7]Score - You: {self.game_logic.player_score} | Computer: {self.game_logic.computer_score}[/color]'
+        # All-time figures come from the stats cache, never from the database
+        mode = "friend" if self.game_logic.game_mode == "friend" else "computer"
+        return (f'[color=bdc3c7]Score - You: {self.game_logic.player_score} | Computer: {self.game_logic.computer_score}\n'
+                f'[size=12]{self.game_logic.stats.summary(mode)}[/size][/color]')
         
     def update_score_display(self):
         self.score_label.text = self.get_score_text()
         
+    def on_enter(self):
+        self.update_score_display()
+        
     def show_difficulty(self, instance):
         self.manager.current = 'difficulty'
         
@@ -140,7 +232,8 @@ class DifficultyScreen(Screen):
         difficulties = [
             ('😊 Easy', 'easy', (0.18, 0.8, 0.44, 1), "I'm learning too!"),
             ('🤔 Medium', 'medium', (0.95, 0.61, 0.07, 1), "Let's have fun!"),
-            ('😈 Hard', 'hard', (0.91, 0.3, 0.24, 1), "Prepare to lose!")
+            ('😈 Hard', 'hard', (0.91, 0.3, 0.24, 1), "Prepare to lose!"),
+            ('🎲 Monte Carlo', 'mcts', (0.1, 0.74, 0.61, 1), "Best on big boards!")
         ]
         
         for text, difficulty, color, desc in difficulties:
@@ -177,6 +270,168 @@ class DifficultyScreen(Screen):
     def go_back(self, instance):
         self.manager.current = 'main_menu'
 
+class BoardWidget(Widget):
+    """The whole board drawn with canvas instructions instead of one Button per cell.
+
+    Touches are mapped to cells arithmetically. Each mark is its own
+    instruction group, so a move adds or removes only that cell's
+    instructions; the grid is redrawn only when the board shape or the
+    widget's size changes.
+    """
+    BACKGROUND = (0.2, 0.29, 0.37, 1)
+    X_COLOR = (0.91, 0.3, 0.24, 1)
+    O_COLOR = (0.2, 0.6, 0.86, 1)
+    # Ultimate mode: small boards won by X or O, and the ones open for the next move
+    X_SHADE = (0.43, 0.17, 0.17, 1)
+    O_SHADE = (0.12, 0.23, 0.37, 1)
+    ACTIVE_SHADE = (0.29, 0.42, 0.53, 1)
+    
+    def __init__(self, cell_callback, **kwargs):
+        super().__init__(**kwargs)
+        self.cell_callback = cell_callback
+        self.board = None
+        self.marks = {}   # (row, col) -> InstructionGroup
+        self.shades = {}  # small board -> colour it is drawn in
+        self.background = InstructionGroup()
+        self.shade_layer = InstructionGroup()
+        self.grid = InstructionGroup()
+        self.mark_layer = InstructionGroup()
+        self.win_layer = InstructionGroup()
+        for layer in (self.background, self.shade_layer, self.grid,
+                      self.mark_layer, self.win_layer):
+            self.canvas.add(layer)
+        self.bind(pos=self.redraw, size=self.redraw)
+        
+    def set_board(self, board):
+        """Show a new or cleared board"""
+        self.board = board
+        self.redraw()
+        
+    def metrics(self):
+        """(left, bottom, cell size) of the square board centred in the widget"""
+        side = min(self.width, self.height)
+        left = self.x + (self.width - side) / 2
+        bottom = self.y + (self.height - side) / 2
+        return left, bottom, side / self.board.size
+        
+    def cell_rect(self, row, col):
+        left, bottom, cell = self.metrics()
+        return left + col * cell, bottom + (self.board.size - 1 - row) * cell, cell
+        
+    def cell_at(self, x, y):
+        """(row, col) under a point, or None outside the board"""
+        left, bottom, cell = self.metrics()
+        size = self.board.size
+        col = int((x - left) // cell) if cell else -1
+        row = size - 1 - int((y - bottom) // cell) if cell else -1
+        if 0 <= row < size and 0 <= col < size:
+            return row, col
+        return None
+        
+    def on_touch_down(self, touch):
+        if self.board is not None and self.collide_point(*touch.pos):
+            cell = self.cell_at(*touch.pos)
+            if cell is not None:
+                self.cell_callback(*cell)
+                return True
+        return super().on_touch_down(touch)
+        
+    def redraw(self, *args):
+        """Rebuild every instruction, for a new board or a new widget size"""
+        if self.board is None:
+            return
+        size = self.board.size
+        left, bottom, cell = self.metrics()
+        side = cell * size
+        ultimate = self.board.variant == "ultimate"
+        
+        self.background.clear()
+        self.background.add(Color(*self.BACKGROUND))
+        self.background.add(Rectangle(pos=(left, bottom), size=(side, side)))
+        
+        self.grid.clear()
+        self.grid.add(Color(0.17, 0.24, 0.31, 1))
+        for i in range(1, size):
+            width = 3 if ultimate and i % 3 == 0 else 1.2
+            offset = i * cell
+            self.grid.add(Line(points=[left + offset, bottom, left + offset, bottom + side],
+                               width=width))
+            self.grid.add(Line(points=[left, bottom + offset, left + side, bottom + offset],
+                               width=width))
+            
+        self.shade_layer.clear()
+        self.shades = {}
+        self.update_shades()
+        
+        self.mark_layer.clear()
+        self.marks = {}
+        for row in range(size):
+            for col in range(size):
+                self.update_cell(row, col)
+        self.update_win_line()
+        
+    def update_cell(self, row, col):
+        """Add, replace or remove the mark drawn in one cell"""
+        player = self.board.get(row, col)
+        group = self.marks.pop((row, col), None)
+        if group is not None:
+            self.mark_layer.remove(group)
+        if not player:
+            return
+        x, y, cell = self.cell_rect(row, col)
+        pad = cell * 0.2
+        width = max(1.5, cell * 0.06)
+        group = InstructionGroup()
+        if player == "X":
+            group.add(Color(*self.X_COLOR))
+            group.add(Line(points=[x + pad, y + pad, x + cell - pad, y + cell - pad], width=width))
+            group.add(Line(points=[x + pad, y + cell - pad, x + cell - pad, y + pad], width=width))
+        else:
+            group.add(Color(*self.O_COLOR))
+            group.add(Line(circle=(x + cell / 2, y + cell / 2, cell / 2 - pad), width=width))
+        self.mark_layer.add(group)
+        self.marks[(row, col)] = group
+        
+    def update_shades(self):
+        """Ultimate mode: recolour the small boards whose state changed"""
+        if self.board is None or self.board.variant != "ultimate":
+            return
+        from ultimate import SUB_O, SUB_OPEN, SUB_X
+        active = self.board.active_boards()
+        left, bottom, cell = self.metrics()
+        for sub_board in range(9):
+            status = self.board.sub_status[sub_board]
+            if status == SUB_X:
+                shade = self.X_SHADE
+            elif status == SUB_O:
+                shade = self.O_SHADE
+            elif status == SUB_OPEN and active >> sub_board & 1:
+                shade = self.ACTIVE_SHADE
+            else:
+                shade = None
+            if self.shades.get(sub_board, False) == shade:
+                continue
+            self.shades[sub_board] = shade
+            self.shade_layer.remove_group(f"sub{sub_board}")
+            if shade is not None:
+                x, y, _ = self.cell_rect((sub_board // 3) * 3 + 2, (sub_board % 3) * 3)
+                self.shade_layer.add(Color(*shade, group=f"sub{sub_board}"))
+                self.shade_layer.add(Rectangle(pos=(x, y), size=(3 * cell, 3 * cell),
+                                               group=f"sub{sub_board}"))
+                
+    def update_win_line(self):
+        """Draw a line through the winning cells, if the game has been won"""
+        self.win_layer.clear()
+        line = self.board.winning_line() if self.board is not None else None
+        if line is None:
+            return
+        (row1, col1), (row2, col2) = line
+        x1, y1, cell = self.cell_rect(row1, col1)
+        x2, y2, _ = self.cell_rect(row2, col2)
+        self.win_layer.add(Color(1, 1, 1, 0.9))
+        self.win_layer.add(Line(points=[x1 + cell / 2, y1 + cell / 2, x2 + cell / 2, y2 + cell / 2],
+                                width=max(2, cell * 0.08), cap='round'))
+
 class GameScreen(Screen):
     def __init__(self, game_logic, **kwargs):
         super().__init__(**kwargs)
@@ -199,21 +454,12 @@ class GameScreen(Screen):
         layout.add_widget(header_layout)
         
         # Game board
-        self.board_layout = GridLayout(cols=3, rows=3, spacing=5, 
-                                      size_hint_y=0.6, pos_hint={'center_x': 0.5})
-        
-        self.buttons = []
-        for i in range(3):
-            row = []
-            for j in range(3):
-                btn = Button(text='', font_size=40, background_color=(0.2, 0.29, 0.37, 1),
-                           color=(1, 1, 1, 1))
-                btn.bind(on_press=lambda x, r=i, c=j: self.make_move(r, c))
-                self.board_layout.add_widget(btn)
-                row.append(btn)
-            self.buttons.append(row)
-            
-        layout.add_widget(self.board_layout)
+        self.board_widget = BoardWidget(self.make_move, size_hint_y=0.6)
+        layout.add_widget(self.board_widget)
+        
+        # Last values pushed to the labels, to skip no-op property updates
+        self.turn_text = None
+        self.score_text = None
         
         # Control buttons
         control_layout = BoxLayout(orientation='horizontal', size_hint_y=0.15, spacing=10)
@@ -228,63 +474,120 @@ class GameScreen(Screen):
         menu_btn.bind(on_press=self.go_to_menu)
         control_layout.add_widget(menu_btn)
         
+        undo_btn = Button(text='Undo', background_color=(0.95, 0.61, 0.07, 1),
+                         font_size=16)
+        undo_btn.bind(on_press=self.undo_move)
+        control_layout.add_widget(undo_btn)
+        
+        redo_btn = Button(text='Redo', background_color=(0.95, 0.61, 0.07, 1),
+                         font_size=16)
+        redo_btn.bind(on_press=self.redo_move)
+        control_layout.add_widget(redo_btn)
+        
         layout.add_widget(control_layout)
         
         self.add_widget(layout)
         
-    def on_enter(self):
-        """Called when screen is displayed"""
+        self.game_logic.add_listener(self.on_game_event)
+        # The screen is built on first visit, after the board was already reset
         self.update_display()
         
+    def build_board(self):
+        """Point the board widget at the current board and redraw it"""
+        self.board_widget.set_board(self.game_logic.board)
+        
+    def on_enter(self):
+        """Called when screen is displayed; the widgets are already up to date"""
+        # Resume a computer turn that was cancelled when the screen was left
+        if self.game_logic.game_active and self.game_logic.game_mode == 'computer' and self.game_logic.current_player == 'O':
+            self.computer_move()
+            
+    def on_leave(self):
+        """Called when another screen is displayed"""
+        self.game_logic.cancel_computer_move()
+        
+    def is_computer_turn(self):
+        return self.game_logic.game_mode == 'computer' and self.game_logic.current_player == 'O'
+        
     def make_move(self, row, col):
+        # Ignore taps while the computer is thinking
+        if self.is_computer_turn():
+            return
         result = self.game_logic.make_move(row, col)
         if result:
             # Add haptic feedback for successful move
             vibrate(30)
-            self.update_display()
             
-            if self.game_logic.game_active and self.game_logic.game_mode == 'computer' and self.game_logic.current_player == 'O':
-                # Schedule computer move after a brief delay
-                Clock.schedule_once(lambda dt: self.computer_move(), 0.8)
+            if self.game_logic.game_active and self.is_computer_turn():
+                self.computer_move()
+                
+    def undo_move(self, instance):
+        self.game_logic.undo_move()
+            
+    def redo_move(self, instance):
+        if self.game_logic.redo_move():
+            if self.game_logic.game_active and self.is_computer_turn():
+                self.computer_move()
                 
     def computer_move(self):
-        result = self.game_logic.computer_move()
+        """Search in the background; the brief delay runs alongside the search"""
+        pending = self.game_logic.computer_move()
+        if pending is None:
+            return
+        future, generation = pending
+        ready_at = time.monotonic() + 0.8
+        
+        def on_done(done_future):
+            # Runs on the worker thread: hand the result to the Kivy loop
+            delay = max(0, ready_at - time.monotonic())
+            Clock.schedule_once(lambda dt: self.finish_computer_move(done_future, generation), delay)
+            
+        future.add_done_callback(on_done)
+        
+    def finish_computer_move(self, future, generation):
+        result = self.game_logic.finish_computer_move(future, generation)
         if result:
             # Add slight vibration for computer move
             vibrate(20)
+            
+    def on_game_event(self, event, data):
+        """Apply one change published by GameLogic to the affected widgets only"""
+        if event == "cell":
+            self.board_widget.update_cell(*data)
+            self.board_widget.update_shades()
+        elif event == "turn":
+            self.update_turn_label()
+        elif event == "score":
+            self.update_score_label()
+        elif event == "game_over":
+            self.board_widget.update_win_line()
+            self.show_game_result(data)
+        elif event == "board":
             self.update_display()
             
     def update_display(self):
-        # Update board buttons
-        for i in range(3):
-            for j in range(3):
-                cell = self.game_logic.board[i][j]
-                self.buttons[i][j].text = cell
-                if cell == 'X':
-                    self.buttons[i][j].color = (0.91, 0.3, 0.24, 1)  # Red
-                elif cell == 'O':
-                    self.buttons[i][j].color = (0.2, 0.6, 0.86, 1)   # Blue
-                else:
-                    self.buttons[i][j].color = (1, 1, 1, 1)          # White
-                    
-        # Update turn label
-        if self.game_logic.game_active:
-            turn_text = self.game_logic.get_turn_text()
+        """Redraw everything; used when the board is cleared or replaced"""
+        self.build_board()
+        self.update_turn_label()
+        self.update_score_label()
+        
+    def update_turn_label(self):
+        if not self.game_logic.game_active:
+            return
+        turn_text = self.game_logic.get_turn_text()
+        if turn_text != self.turn_text:
+            self.turn_text = turn_text
             self.turn_label.text = f'[color=ffffff][size=20][b]{turn_text}[/b][/size][/color]'
-        
-        # Update score
+            
+    def update_score_label(self):
         score_text = self.game_logic.get_score_text()
-        self.score_label.text = f'[color=bdc3c7]{score_text}[/color]'
-        
-        # Check for game end
-        winner = self.game_logic.check_winner()
-        if winner or self.game_logic.is_board_full():
-            self.show_game_result(winner)
+        if score_text != self.score_text:
+            self.score_text = score_text
+            self.score_label.text = f'[color=bdc3c7]{score_text}[/color]'
             
     def show_game_result(self, winner):
-        self.game_logic.game_active = False
-        
-        if winner == "draw" or (winner is None and self.game_logic.is_board_full()):
+        """Announce a result; GameLogic.end_game has already counted it"""
+        if winner == "draw":
             title = "It's a Draw! 🤝"
             message = "Good game! Want to play again?"
             vibrate(100)  # Longer vibration for draw
@@ -293,20 +596,14 @@ class GameScreen(Screen):
                 if winner == "X":
                     title = "🎉 You Win!"
                     message = "Congratulations! You beat the computer!"
-                    self.game_logic.player_score += 1
                     vibrate(200)  # Victory vibration
                 else:
                     title = "🤖 Computer Wins!"
                     message = "Better luck next time!"
-                    self.game_logic.computer_score += 1
                     vibrate(50)   # Defeat vibration
             else:  # friend mode
                 title = f"🎉 Player {winner} Wins!"
                 message = "Great game! Play another round?"
-                if winner == "X":
-                    self.game_logic.player_score += 1
-                else:
-                    self.game_logic.friend_score += 1
                 vibrate(200)  # Victory vibration
         
         # Create popup
@@ -328,6 +625,7 @@ class GameScreen(Screen):
         
         content.add_widget(button_layout)
         
+        from kivy.uix.popup import Popup
         self.result_popup = Popup(title=title, content=content, size_hint=(0.8, 0.4),
                                  auto_dismiss=False)
         self.result_popup.open()
@@ -342,7 +640,6 @@ class GameScreen(Screen):
         
     def new_game(self, instance):
         self.game_logic.reset_board()
-        self.update_display()
         
     def go_to_menu(self, instance):
         # Update main menu score display
@@ -355,6 +652,7 @@ class SettingsScreen(Screen):
         super().__init__(**kwargs)
         self.game_logic = game_logic
         self.name = 'settings'
+        from kivy.uix.switch import Switch
         
         layout = BoxLayout(orientation='vertical', padding=20, spacing=20)
         
@@ -378,6 +676,48 @@ class SettingsScreen(Screen):
         
         settings_layout.add_widget(sound_layout)
         
+        # Ultimate mode toggle
+        ultimate_layout = BoxLayout(orientation='horizontal', size_hint_y=0.3)
+        ultimate_label = Label(text='[color=ffffff][size=16]Ultimate Mode (3x3 of 3x3)[/size][/color]',
+                              markup=True, size_hint_x=0.7)
+        ultimate_layout.add_widget(ultimate_label)
+        
+        self.ultimate_switch = Switch(active=self.game_logic.ultimate_mode, size_hint_x=0.3)
+        self.ultimate_switch.bind(active=self.toggle_ultimate)
+        ultimate_layout.add_widget(self.ultimate_switch)
+        
+        settings_layout.add_widget(ultimate_layout)
+        
+        # Board size selection
+        size_label = Label(text='[color=ffffff][size=16]Board Size[/size][/color]',
+                          markup=True, size_hint_y=0.15)
+        settings_layout.add_widget(size_label)
+        
+        size_layout = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=0.25)
+        self.size_buttons = {}
+        for size, win_length, label in BOARD_PRESETS:
+            size_btn = Button(text=label, font_size=12)
+            size_btn.bind(on_press=lambda x, s=size, k=win_length: self.set_board_size(s, k))
+            size_layout.add_widget(size_btn)
+            self.size_buttons[(size, win_length)] = size_btn
+        settings_layout.add_widget(size_layout)
+        self.update_size_buttons()
+        
+        # Think time selection
+        think_label = Label(text='[color=ffffff][size=16]Computer Think Time[/size][/color]',
+                           markup=True, size_hint_y=0.15)
+        settings_layout.add_widget(think_label)
+        
+        think_layout = BoxLayout(orientation='horizontal', spacing=5, size_hint_y=0.25)
+        self.think_buttons = {}
+        for seconds, label in game_ai.THINK_TIME_PRESETS:
+            think_btn = Button(text=label, font_size=12)
+            think_btn.bind(on_press=lambda x, t=seconds: self.set_think_time(t))
+            think_layout.add_widget(think_btn)
+            self.think_buttons[seconds] = think_btn
+        settings_layout.add_widget(think_layout)
+        self.update_think_buttons()
+        
         # Reset scores button
         reset_btn = Button(text='Reset All Scores',
                           background_color=(0.91, 0.3, 0.24, 1),
@@ -385,6 +725,13 @@ class SettingsScreen(Screen):
         reset_btn.bind(on_press=self.reset_scores)
         settings_layout.add_widget(reset_btn)
         
+        # Computer move latency report
+        latency_btn = Button(text='AI Latency Stats',
+                            background_color=(0.2, 0.29, 0.37, 1),
+                            size_hint_y=0.3, font_size=16)
+        latency_btn.bind(on_press=self.show_latency_stats)
+        settings_layout.add_widget(latency_btn)
+        
         layout.add_widget(settings_layout)
         
         # Back button
@@ -399,6 +746,32 @@ class SettingsScreen(Screen):
     def toggle_sound(self, instance, value):
         self.game_logic.sounds_enabled = value
         
+    def toggle_ultimate(self, instance, value):
+        self.game_logic.ultimate_mode = value
+        
+    def set_board_size(self, size, win_length):
+        self.game_logic.set_board_size(size, win_length)
+        self.update_size_buttons()
+        
+    def set_think_time(self, seconds):
+        self.game_logic.set_think_time(seconds)
+        self.update_think_buttons()
+        
+    def update_think_buttons(self):
+        for seconds, btn in self.think_buttons.items():
+            if seconds == self.game_logic.think_time:
+                btn.background_color = (0.2, 0.6, 0.86, 1)
+            else:
+                btn.background_color = (0.2, 0.29, 0.37, 1)
+                
+    def update_size_buttons(self):
+        selected = (self.game_logic.board_size, self.game_logic.win_length)
+        for preset, btn in self.size_buttons.items():
+            if preset == selected:
+                btn.background_color = (0.2, 0.6, 0.86, 1)
+            else:
+                btn.background_color = (0.2, 0.29, 0.37, 1)
+        
     def reset_scores(self, instance):
         # Create confirmation popup
         content = BoxLayout(orientation='vertical', spacing=10, padding=10)
@@ -419,10 +792,27 @@ class SettingsScreen(Screen):
         
         content.add_widget(button_layout)
         
+        from kivy.uix.popup import Popup
         self.reset_popup = Popup(title='Reset Scores', content=content, 
                                size_hint=(0.8, 0.3), auto_dismiss=False)
         self.reset_popup.open()
         
+    def show_latency_stats(self, instance):
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        
+        stats_label = Label(text=ai_stats.dump(), font_name='RobotoMono-Regular',
+                           font_size=11, size_hint_y=0.85)
+        content.add_widget(stats_label)
+        
+        close_btn = Button(text='Close', background_color=(0.58, 0.65, 0.65, 1),
+                          size_hint_y=0.15)
+        content.add_widget(close_btn)
+        
+        from kivy.uix.popup import Popup
+        popup = Popup(title='AI Latency Stats', content=content, size_hint=(0.95, 0.6))
+        close_btn.bind(on_press=popup.dismiss)
+        popup.open()
+        
     def confirm_reset(self):
         self.game_logic.reset_scores()
         self.reset_popup.dismiss()
@@ -430,6 +820,7 @@ class SettingsScreen(Screen):
         # Show confirmation
         content = Label(text='[color=ffffff]All scores have been reset![/color]',
                        markup=True)
+        from kivy.uix.popup import Popup
         popup = Popup(title='Scores Reset', content=content, 
                      size_hint=(0.6, 0.2), auto_dismiss=True)
         popup.open()
@@ -442,6 +833,7 @@ class HelpScreen(Screen):
         super().__init__(**kwargs)
         self.game_logic = game_logic
         self.name = 'help'
+        from kivy.uix.scrollview import ScrollView
         
         layout = BoxLayout(orientation='vertical', padding=20, spacing=15)
         
@@ -461,12 +853,15 @@ class HelpScreen(Screen):
 • First to get 3 in a row wins
 • 3 in a row can be horizontal, vertical, or diagonal  
 • If the board fills up with no winner, it's a draw
+• [b]Ultimate mode:[/b] the cell you pick sends your opponent to that
+  small board; win three small boards in a row to win the game
 
 🎮 [b]Game Modes:[/b]
-• [b]Play vs Computer:[/b] Choose from 3 difficulty levels
+• [b]Play vs Computer:[/b] Choose from 4 difficulty levels
   - Easy: Makes some random moves
   - Medium: Blocks your wins and tries to win
   - Hard: Perfect play - very challenging!
+  - Monte Carlo: Plays out random games - strong on big boards
 • [b]Play vs Friend:[/b] Take turns on the same device
 
 ⚙️ [b]Settings:[/b]
@@ -503,160 +898,204 @@ Good luck and have fun! 🎉
         self.manager.current = 'main_menu'
 
 class GameLogic:
-    def __init__(self):
-        self.board = [["" for _ in range(3)] for _ in range(3)]
+    def __init__(self, stats_path=stats_store.DEFAULT_PATH):
+        self.board = Board()
         self.current_player = "X"
         self.game_mode = None  # "computer" or "friend"
         self.difficulty = "medium"  # "easy", "medium", "hard"
+        self.board_size = 3
+        self.win_length = 3
+        self.ultimate_mode = False  # nine linked 3x3 boards instead of one
+        self.think_time = game_ai.DEFAULT_THINK_TIME  # seconds per computer move
         self.player_score = 0
         self.computer_score = 0
         self.friend_score = 0
         self.game_active = False
+        self.game_started = time.monotonic()
         self.sounds_enabled = True
+        self.ai_worker = AIWorker()
+        # All-time statistics, saved by a background thread
+        self.stats = stats_store.StatsStore(stats_path)
+        # Callbacks taking (event, data); see notify
+        self.listeners = []
+        
+    def add_listener(self, callback):
+        """Subscribe callback(event, data) to changes in the game state"""
+        self.listeners.append(callback)
+        
+    def notify(self, event, data=None):
+        """Publish a change: "cell" (row, col), "turn", "score",
+        "game_over" (winner or "draw") or "board" (cleared or replaced)"""
+        for callback in self.listeners:
+            callback(event, data)
+        
+    def set_board_size(self, size, win_length):
+        """Choose the board size used by the next game"""
+        self.board_size = size
+        self.win_length = win_length
+        
+    def set_think_time(self, seconds):
+        """Choose how long the computer may search for each move"""
+        self.think_time = seconds
         
     def reset_board(self):
         """Reset the game board"""
-        self.board = [["" for _ in range(3)] for _ in range(3)]
+        self.cancel_computer_move()
+        if self.ultimate_mode:
+            if self.board.variant != "ultimate":
+                from ultimate import UltimateBoard
+                self.board = UltimateBoard()
+            else:
+                self.board.reset()
+        elif (self.board.variant, self.board.size, self.board.win_length) != (
+                "standard", self.board_size, self.win_length):
+            self.board = Board(self.board_size, self.win_length)
+        else:
+            self.board.reset()
         self.current_player = "X"
         self.game_active = True
+        self.game_started = time.monotonic()
+        self.notify("board")
+        
+    def snapshot(self):
+        """SavedGame of the board, scores and settings, for savegame.save"""
+        return savegame.snapshot(
+            self.board, to_move=self.current_player, game_active=self.game_active,
+            game_mode=self.game_mode, difficulty=self.difficulty,
+            next_size=self.board_size, next_win_length=self.win_length,
+            ultimate_mode=self.ultimate_mode, think_time=self.think_time,
+            sounds_enabled=self.sounds_enabled, player_score=self.player_score,
+            computer_score=self.computer_score, friend_score=self.friend_score)
+        
+    def restore(self, saved):
+        """Continue from a SavedGame; raises ValueError if it is inconsistent"""
+        self.cancel_computer_move()
+        self.board = savegame.restore(saved)
+        self.current_player = saved.to_move
+        self.game_active = saved.game_active
+        self.game_mode = saved.game_mode
+        self.difficulty = saved.difficulty
+        self.board_size = saved.next_size
+        self.win_length = saved.next_win_length
+        self.ultimate_mode = saved.ultimate_mode
+        self.think_time = saved.think_time
+        self.sounds_enabled = saved.sounds_enabled
+        self.player_score = saved.player_score
+        self.computer_score = saved.computer_score
+        self.friend_score = saved.friend_score
+        self.game_started = time.monotonic()
+        self.notify("board")
         
     def reset_scores(self):
         """Reset all scores"""
         self.player_score = 0
         self.computer_score = 0
         self.friend_score = 0
+        self.stats.reset()
+        self.notify("score")
         
     def make_move(self, row, col):
         """Handle player move"""
-        if not self.game_active or self.board[row][col] != "":
+        if not self.game_active or not self.board.is_legal(row, col):
             return False
             
-        self.board[row][col] = self.current_player
+        self.board.play((row, col))
+        self.notify("cell", (row, col))
+        self.after_moves()
+        return True
         
-        # Check for game end
-        if not (self.check_winner() or self.is_board_full()):
-            # Switch turns only if game continues
-            self.current_player = "O" if self.current_player == "X" else "X"
+    def after_moves(self):
+        """End the game or pass the turn once the board has changed"""
+        winner = self.check_winner()
+        if winner or self.is_board_full():
+            self.end_game(winner or "draw")
+        else:
+            self.current_player = self.board.current_player
+            self.notify("turn")
             
+    def end_game(self, winner):
+        """Stop the game, count the result and announce it"""
+        self.game_active = False
+        if winner == "X":
+            self.player_score += 1
+        elif winner == "O":
+            if self.game_mode == "computer":
+                self.computer_score += 1
+            else:
+                self.friend_score += 1
+        self.stats.record(self.game_mode, self.difficulty, winner,
+                          time.monotonic() - self.game_started,
+                          ai_stats.board_label(self.board), self.board.move_count)
+        if winner != "draw":
+            self.notify("score")
+        self.notify("game_over", winner)
+        
+    def undo_move(self):
+        """Take back the last move, and the computer's reply in computer mode"""
+        if not self.game_active or not self.board.can_undo():
+            return False
+        self.cancel_computer_move()
+        self.notify("cell", self.board.undo())
+        while (self.game_mode == "computer" and self.board.current_player == "O"
+               and self.board.can_undo()):
+            self.notify("cell", self.board.undo())
+        self.current_player = self.board.current_player
+        self.notify("turn")
+        return True
+        
+    def redo_move(self):
+        """Replay the last undone move, and the computer's reply in computer mode"""
+        if not self.game_active or not self.board.can_redo():
+            return False
+        self.notify("cell", self.board.redo())
+        if (self.game_mode == "computer" and self.board.current_player == "O"
+                and self.board.can_redo()):
+            self.notify("cell", self.board.redo())
+        self.after_moves()
         return True
         
     def computer_move(self):
-        """Handle computer move based on difficulty"""
+        """Start the computer's move search; return (future, generation) or None"""
         if not self.game_active or self.current_player != "O":
-            return False
-            
-        move = None
+            return None
+        return self.ai_worker.submit(self.board, "O", self.difficulty, self.think_time)
         
-        if self.difficulty == "easy":
-            if random.random() < 0.3:
-                move = self.get_best_move()
-            if move is None:
-                move = self.get_random_move()
-                
-        elif self.difficulty == "medium":
-            move = self.get_winning_move("O")  # Try to win
-            if move is None:
-                move = self.get_winning_move("X")  # Block player
-            if move is None:
-                move = self.get_random_move()
-                
-        else:  # hard
-            move = self.get_best_move()
-            
+    def finish_computer_move(self, future, generation):
+        """Play a finished search result, unless the game moved on since"""
+        if not self.ai_worker.is_current(generation) or not future.done():
+            return False
+        error = future.exception()
+        if error is not None:
+            # Keep the game going rather than leave it stuck on the computer's turn
+            ai_stats.logger.error("Computer move search failed", exc_info=error)
+            move = self.get_random_move()
+        else:
+            move = future.result()
+            ai_stats.emit(self.ai_worker.last_stats)
         if move:
             row, col = move
             return self.make_move(row, col)
         return False
         
+    def cancel_computer_move(self):
+        """Drop any search in flight"""
+        self.ai_worker.cancel()
+        
     def get_random_move(self):
         """Get a random available move"""
-        available = [(i, j) for i in range(3) for j in range(3) if self.board[i][j] == ""]
-        return random.choice(available) if available else None
+        return game_ai.get_random_move(self.board)
         
     def get_winning_move(self, player):
         """Check if player can win in next move"""
-        for i in range(3):
-            for j in range(3):
-                if self.board[i][j] == "":
-                    self.board[i][j] = player
-                    if self.check_winner() == player:
-                        self.board[i][j] = ""
-                        return (i, j)
-                    self.board[i][j] = ""
-        return None
+        return game_ai.get_winning_move(self.board, player)
         
-    def get_best_move(self):
-        """Get the best move using minimax algorithm"""
-        best_score = float('-inf')
-        best_move = None
-        
-        for i in range(3):
-            for j in range(3):
-                if self.board[i][j] == "":
-                    self.board[i][j] = "O"
-                    score = self.minimax(0, False)
-                    self.board[i][j] = ""
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_move = (i, j)
-                        
-        return best_move
-        
-    def minimax(self, depth, is_maximizing):
-        """Minimax algorithm for optimal play"""
-        winner = self.check_winner()
-        if winner == "O":
-            return 1
-        elif winner == "X":
-            return -1
-        elif self.is_board_full():
-            return 0
-            
-        if is_maximizing:
-            best_score = float('-inf')
-            for i in range(3):
-                for j in range(3):
-                    if self.board[i][j] == "":
-                        self.board[i][j] = "O"
-                        score = self.minimax(depth + 1, False)
-                        self.board[i][j] = ""
-                        best_score = max(score, best_score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for i in range(3):
-                for j in range(3):
-                    if self.board[i][j] == "":
-                        self.board[i][j] = "X"
-                        score = self.minimax(depth + 1, True)
-                        self.board[i][j] = ""
-                        best_score = min(score, best_score)
-            return best_score
-            
     def check_winner(self):
         """Check if there's a winner"""
-        # Check rows
-        for row in self.board:
-            if row[0] == row[1] == row[2] != "":
-                return row[0]
-                
-        # Check columns
-        for col in range(3):
-            if self.board[0][col] == self.board[1][col] == self.board[2][col] != "":
-                return self.board[0][col]
-                
-        # Check diagonals
-        if self.board[0][0] == self.board[1][1] == self.board[2][2] != "":
-            return self.board[0][0]
-        if self.board[0][2] == self.board[1][1] == self.board[2][0] != "":
-            return self.board[0][2]
-            
-        return None
+        return self.board.check_winner()
         
     def is_board_full(self):
         """Check if board is full"""
-        return all(cell != "" for row in self.board for cell in row)
+        return self.board.is_full()
         
     def get_turn_text(self):
         """Get current turn display text"""
@@ -672,6 +1111,22 @@ class GameLogic:
         else:
             return f"Player X: {self.player_score} | Player O: {self.friend_score}"
 
+class LazyScreenManager(ScreenManager):
+    """Screen manager that builds each registered screen on first use"""
+    
+    def __init__(self, factories, **kwargs):
+        super().__init__(**kwargs)
+        self.factories = factories
+        
+    def get_screen(self, name):
+        factory = self.factories.pop(name, None)
+        if factory is not None:
+            start = time.perf_counter()
+            self.add_widget(factory())
+            startup_timer.log.info("Built %s screen in %.0f ms", name,
+                                   1000 * (time.perf_counter() - start))
+        return super().get_screen(name)
+
 class TicTacToeApp(App):
     def build(self):
         # Set app properties
@@ -684,22 +1139,63 @@ class TicTacToeApp(App):
         Window.bind(on_resize=self.on_window_resize)
         
         # Initialize game logic
-        self.game_logic = GameLogic()
-        
-        # Create screen manager
-        sm = ScreenManager()
-        
-        # Add screens
+        self.game_logic = GameLogic(os.path.join(self.user_data_dir, 'stats.db'))
+        
+        # Create screen manager; only the main menu is built up front
+        logic = self.game_logic
+        sm = LazyScreenManager({
+            'difficulty': lambda: DifficultyScreen(logic),
+            'game': lambda: GameScreen(logic),
+            'settings': lambda: SettingsScreen(logic),
+            'help': lambda: HelpScreen(logic),
+        })
+        # Pick up where a paused or killed process left off
+        restored = self.restore_game()
+        if restored:
+            startup_timer.mark("restore")
         sm.add_widget(MainMenuScreen(self.game_logic))
-        sm.add_widget(DifficultyScreen(self.game_logic))
-        sm.add_widget(GameScreen(self.game_logic))
-        sm.add_widget(SettingsScreen(self.game_logic))
-        sm.add_widget(HelpScreen(self.game_logic))
+        if restored and self.game_logic.game_active:
+            sm.current = 'game'
         
+        startup_timer.mark("build")
         return sm
     
+    def save_path(self):
+        return os.path.join(self.user_data_dir, 'savegame.bin')
+    
+    def save_game(self):
+        """Snapshot the game so a restart resumes it"""
+        try:
+            savegame.save(self.save_path(), self.game_logic.snapshot())
+        except OSError as e:
+            print(f"Saving the game failed: {e}")
+    
+    def restore_game(self):
+        """Load the last snapshot, if any; True when it was restored"""
+        saved = savegame.load(self.save_path())
+        if saved is None:
+            return False
+        try:
+            self.game_logic.restore(saved)
+        except ValueError as e:
+            print(f"Ignoring saved game: {e}")
+            return False
+        return True
+    
+    def on_start(self):
+        """Report startup timing once the first frame has been shown"""
+        Window.bind(on_flip=self.on_first_frame)
+        
+    def on_first_frame(self, *args):
+        Window.unbind(on_flip=self.on_first_frame)
+        startup_timer.mark("first frame")
+        startup_timer.report()
+    
     def on_keyboard(self, instance, key, scancode, codepoint, modifier):
-        """Handle Android back button"""
+        """Handle Android back button and the F12 debug key"""
+        if key == 293:  # F12: log the computer's move latency histogram
+            ai_stats.dump()
+            return True
         if key == 27:  # Back button pressed
             if self.root.current == 'main_menu':
                 # If on main menu, minimize app instead of closing
@@ -733,14 +1229,34 @@ class TicTacToeApp(App):
             # Portrait mode
             print("Portrait mode detected")
     
+    def on_stop(self):
+        """Save the game and statistics and stop the background workers"""
+        self.save_game()
+        self.game_logic.stats.close()
+        self.game_logic.ai_worker.shutdown()
+    
     def on_pause(self):
-        """Handle app pause (Android lifecycle)"""
+        """Save the game in case Android kills the paused process"""
+        self.save_game()
+        self.game_logic.stats.flush(wait=False)
         return True  # Allow app to pause
     
     def on_resume(self):
-        """Handle app resume (Android lifecycle)"""
+        """The process survived the pause, so the game is still in memory"""
         pass
 
 # Run the app
 if __name__ == '__main__':
-    TicTacToeApp().run()
\ No newline at end of file
+    # TICTACTOE_PROFILE or "-- --profile": sample handlers, refreshes and AI searches
+    profiler = profiling.start_from_environment([
+        (TicTacToeApp, ("build",), "ui"),
+        (BoardWidget, ("redraw", "update_cell", "update_shades", "on_touch_down"), "ui"),
+        (GameScreen, ("build_board", "on_game_event", "update_display",
+                      "make_move", "computer_move", "finish_computer_move", "undo_move", "redo_move",
+                      "new_game", "on_enter"), "ui"),
+        (GameLogic, ("make_move", "reset_board", "undo_move", "redo_move"), "logic"),
+        (AIWorker, ("_search",), "ai"),
+    ])
+    TicTacToeApp().run()
+    if profiler:
+        profiler.stop()
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""Per-move statistics and latency histograms for computer moves.
+
+AIWorker builds a MoveStats for every finished search and adds it to the
+process-wide ``histogram``. The front-ends call emit() when they play the
+move, which logs it as one JSON line on the "tictactoe.ai" logger.
+Latencies are grouped by (strategy, board) so a dump shows at a glance
+which difficulty and board-size combinations overrun their think time.
+"""
+
+import json
+import logging
+import threading
+from collections import namedtuple
+
+logger = logging.getLogger("tictactoe.ai")
+
+MoveStats = namedtuple("MoveStats", "strategy board nodes table_hits depth wall_ms budget_ms")
+
+# Upper bounds of the histogram buckets in milliseconds; the last is open-ended
+BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float("inf"))
+
+# A search that uses its whole think time ends a little after it; only
+# moves slower than this multiple of the budget count as over budget
+OVER_BUDGET_SLACK = 1.2
+
+
+def board_label(board):
+    """Short name of a board shape, e.g. "3x3k3" or "ultimate" """
+    if board.variant == "ultimate":
+        return "ultimate"
+    return f"{board.size}x{board.size}k{board.win_length}"
+
+
+class LatencyHistogram:
+    """Bucketed move latencies per (strategy, board); safe to share between threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.series = {}
+
+    def record(self, stats):
+        key = (stats.strategy, stats.board)
+        with self._lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {
+                    "counts": [0] * len(BUCKET_BOUNDS_MS),
+                    "moves": 0, "total_ms": 0.0, "max_ms": 0.0, "over_budget": 0,
+                }
+            bucket = next(i for i, bound in enumerate(BUCKET_BOUNDS_MS)
+                          if stats.wall_ms <= bound)
+            series["counts"][bucket] += 1
+            series["moves"] += 1
+            series["total_ms"] += stats.wall_ms
+            series["max_ms"] = max(series["max_ms"], stats.wall_ms)
+            if (stats.budget_ms is not None
+                    and stats.wall_ms > OVER_BUDGET_SLACK * stats.budget_ms):
+                series["over_budget"] += 1
+
+    def clear(self):
+        with self._lock:
+            self.series.clear()
+
+    def snapshot(self):
+        """Copy of the data, keyed by "strategy/board" for JSON output"""
+        with self._lock:
+            return {f"{strategy}/{board}": {**series, "counts": series["counts"][:]}
+                    for (strategy, board), series in sorted(self.series.items())}
+
+    def percentile(self, counts, fraction):
+        """Upper bound of the bucket holding the given fraction of moves"""
+        target = fraction * sum(counts)
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS_MS, counts):
+            seen += count
+            if count and seen >= target:
+                return bound
+        return 0
+
+    def format(self):
+        """Plain-text table for the settings screen and debug dumps"""
+        snapshot = self.snapshot()
+        if not snapshot:
+            return "No computer moves recorded yet."
+        lines = [f"{'strategy/board':<20}{'moves':>6}{'mean':>8}{'p50':>7}"
+                 f"{'p95':>7}{'max':>8}{'over':>6}"]
+        for key, series in snapshot.items():
+            mean = series["total_ms"] / series["moves"]
+            p50 = self.percentile(series["counts"], 0.5)
+            p95 = self.percentile(series["counts"], 0.95)
+            lines.append(f"{key:<20}{series['moves']:>6}{mean:>8.1f}{p50:>7.0f}"
+                         f"{p95:>7.0f}{series['max_ms']:>8.1f}{series['over_budget']:>6}")
+        lines.append("Times in ms; p50/p95 are bucket upper bounds; "
+                     "'over' counts moves well past the think time.")
+        return "\n".join(lines)
+
+
+histogram = LatencyHistogram()
+
+
+def emit(stats):
+    """Log one move's stats as a JSON line"""
+    if stats is not None:
+        logger.info(json.dumps(stats._asdict()))
+
+
+def dump():
+    """Log the latency histogram and return it as text"""
+    text = histogram.format()
+    logger.info("AI latency histogram\n%s", text)
+    return text
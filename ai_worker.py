@@ -0,0 +1,68 @@
+"""Background thread for computer move searches.
+
+The front-ends submit a search, keep the returned generation number and
+poll the future from their own event loop. Cancelling bumps the
+generation, so a result that arrives after "New Game" or "Main Menu" is
+recognised as stale and dropped, and also tells the running search to
+stop at its next check.
+
+Every finished search leaves its MoveStats in last_stats and in the
+ai_stats latency histogram.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ai_stats
+import game_ai
+
+
+class AIWorker:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ai")
+        self.generation = 0
+        self._stop = threading.Event()
+        self.last_stats = None
+
+    def submit(self, board, player, difficulty, time_budget=None):
+        """Start choosing a move on a snapshot of board; return (future, generation)"""
+        self._stop = threading.Event()
+        future = self.executor.submit(self._search, board.copy(), player,
+                                      difficulty, self._stop.is_set, time_budget)
+        return future, self.generation
+
+    def _search(self, board, player, difficulty, should_stop, time_budget):
+        """Run choose_move on the worker thread and record how it went"""
+        table = None
+        if board.variant != "ultimate":
+            table = game_ai.get_context(board.geometry).table
+        hits = table.hits if table is not None else 0
+        game_ai.search_stats.reset()
+        start = time.perf_counter()
+        move = game_ai.choose_move(board, player, difficulty, should_stop, time_budget)
+        stats = ai_stats.MoveStats(
+            strategy=difficulty,
+            board=ai_stats.board_label(board),
+            nodes=game_ai.search_stats.nodes,
+            table_hits=table.hits - hits if table is not None else 0,
+            depth=game_ai.search_stats.depth,
+            wall_ms=round(1000 * (time.perf_counter() - start), 3),
+            budget_ms=1000 * time_budget if time_budget is not None else None,
+        )
+        ai_stats.histogram.record(stats)
+        self.last_stats = stats
+        return move
+
+    def is_current(self, generation):
+        """Check that no cancel happened since the search was submitted"""
+        return generation == self.generation
+
+    def cancel(self):
+        """Abandon the running search and mark its result as stale"""
+        self.generation += 1
+        self._stop.set()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,124 @@
+"""Vectorised evaluation of many positions at once with NumPy.
+
+For analytics and self-play post-processing, where checking millions of
+boards one at a time is too slow. Positions are handled as two boolean
+arrays of shape (N, cells), one per player; from_grids and
+from_bitmasks build them from (N, size, size) grids or from the
+engine's integer bitmasks. Per-line mark counts come from one matrix
+product with the geometry's line/cell incidence matrix, and everything
+else is derived from those counts.
+
+Requires NumPy, which the game front-ends themselves do not need.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from game_engine import CLASSIC, get_geometry
+
+ONGOING, X_WINS, O_WINS, DRAW = 0, 1, 2, 3
+NO_MOVE = -1
+
+BatchResult = namedtuple("BatchResult", "winner legal win_move block_move")
+
+_line_matrices = {}
+
+
+def line_matrix(geometry=CLASSIC):
+    """Return the (lines, cells) 0/1 incidence matrix of a geometry"""
+    matrix = _line_matrices.get(geometry)
+    if matrix is None:
+        matrix = np.zeros((len(geometry.win_masks), geometry.cells), dtype=np.int16)
+        for i, line in enumerate(geometry.win_masks):
+            for cell in range(geometry.cells):
+                if line >> cell & 1:
+                    matrix[i, cell] = 1
+        _line_matrices[geometry] = matrix
+    return matrix
+
+
+def from_grids(grids):
+    """Split (N, size, size) grids of 0 (empty), 1 (X), 2 (O) into cell arrays.
+
+    Returns (x_cells, o_cells, geometry); the win length is the default
+    for that size, call get_geometry yourself for other shapes.
+    """
+    grids = np.asarray(grids)
+    n, size, _ = grids.shape
+    flat = grids.reshape(n, size * size)
+    return flat == 1, flat == 2, get_geometry(size)
+
+
+def from_bitmasks(x_bits, o_bits, geometry=CLASSIC):
+    """Expand arrays of engine bitmasks into (N, cells) boolean arrays.
+
+    Only boards of up to 64 cells fit in the uint64 masks.
+    """
+    if geometry.cells > 64:
+        raise ValueError("bitmask input supports at most 64 cells; use from_grids")
+    shifts = np.arange(geometry.cells, dtype=np.uint64)
+    x_bits = np.asarray(x_bits, dtype=np.uint64)[:, None]
+    o_bits = np.asarray(o_bits, dtype=np.uint64)[:, None]
+    one = np.uint64(1)
+    return (x_bits >> shifts) & one == one, (o_bits >> shifts) & one == one
+
+
+def line_counts(cells, geometry=CLASSIC):
+    """Marks per line for every board: shape (N, lines)"""
+    return cells.astype(np.int16) @ line_matrix(geometry).T
+
+
+def winner_codes(x_cells, o_cells, geometry=CLASSIC):
+    """ONGOING, X_WINS, O_WINS or DRAW for every board"""
+    k = geometry.win_length
+    x_won = (line_counts(x_cells, geometry) == k).any(axis=1)
+    o_won = (line_counts(o_cells, geometry) == k).any(axis=1)
+    full = (x_cells | o_cells).all(axis=1)
+    codes = np.full(len(x_cells), ONGOING, dtype=np.int8)
+    codes[full] = DRAW
+    codes[o_won] = O_WINS
+    codes[x_won] = X_WINS
+    return codes
+
+
+def legal_move_masks(x_cells, o_cells, geometry=CLASSIC, winner=None):
+    """Empty cells of every unfinished board, as an (N, cells) boolean array"""
+    if winner is None:
+        winner = winner_codes(x_cells, o_cells, geometry)
+    return ~(x_cells | o_cells) & (winner == ONGOING)[:, None]
+
+
+def winning_moves(own_cells, opp_cells, geometry=CLASSIC):
+    """Lowest cell that completes a line for own on each board, or NO_MOVE.
+
+    The batch version of game_ai.get_winning_move: a line is one move
+    from complete when own has K-1 marks on it and the opponent none.
+    """
+    k = geometry.win_length
+    matrix = line_matrix(geometry)
+    own_counts = line_counts(own_cells, geometry)
+    opp_counts = line_counts(opp_cells, geometry)
+    threats = ((own_counts == k - 1) & (opp_counts == 0)).astype(np.int16)
+    empty = ~(own_cells | opp_cells)
+    hits = (threats @ matrix > 0) & empty
+    moves = hits.argmax(axis=1)
+    return np.where(hits.any(axis=1), moves, NO_MOVE)
+
+
+def evaluate(x_cells, o_cells, geometry=CLASSIC):
+    """Winner codes, legal moves, and immediate win/block moves for the side to move.
+
+    The side to move is X when both players have the same number of
+    marks, otherwise O. Moves are cell indices (row * size + col), and
+    NO_MOVE where there is none or the game is over.
+    """
+    winner = winner_codes(x_cells, o_cells, geometry)
+    legal = legal_move_masks(x_cells, o_cells, geometry, winner)
+    x_to_move = (x_cells.sum(axis=1) == o_cells.sum(axis=1))[:, None]
+    own = np.where(x_to_move, x_cells, o_cells)
+    opp = np.where(x_to_move, o_cells, x_cells)
+    ongoing = winner == ONGOING
+    win_move = np.where(ongoing, winning_moves(own, opp, geometry), NO_MOVE)
+    block_move = np.where(ongoing, winning_moves(opp, own, geometry), NO_MOVE)
+    return BatchResult(winner, legal, win_move, block_move)
@@ -0,0 +1,295 @@
+"""Headless benchmarks for the engine hot paths.
+
+Measures search speed (nodes per second), first-move latency from the
+empty board, per-move latency over a fixed corpus of positions, the cost
+of the move helpers (check_winner, get_winning_move, get_random_move) and
+single-process self-play throughput. Searches run to a fixed depth from a
+cold table so every run does the same work, and each measurement is
+repeated with the best timing kept. Results are written as JSON so runs
+can be compared:
+
+    python benchmark.py --output baseline.json
+    python benchmark.py --output new.json --compare baseline.json
+
+With --compare, every metric whose best round is worse than the
+baseline's worst round by more than --tolerance (default 25%) is
+reported and the exit status is 1.
+"""
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import game_ai
+import selfplay
+from game_engine import Board, other
+
+# Board shapes benchmarked: (size, win_length, label)
+SHAPES = ((3, 3, "3x3"), (4, 4, "4x4"), (5, 4, "5x5k4"), (15, 5, "15x15k5"))
+
+# Allowed slowdown beyond the baseline's noise band (its worst round).
+# Back-to-back --quick runs on a shared single-core VM stayed within 10%
+# of the band; 25% leaves room for busier spells
+DEFAULT_TOLERANCE = 0.25
+
+# Latencies below this many milliseconds are not checked by --compare
+MIN_GATED_MS = 1.0
+
+
+def metric(value, unit, higher_is_better):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+
+def make_corpus(size, win_length, count, seed=0):
+    """Reproducible unfinished positions reached by random play"""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        board = Board(size, win_length)
+        for _ in range(rng.randrange(min(board.geometry.cells, 12))):
+            board.push(rng.choice(board.legal_moves()))
+            if board.winner is not None or board.is_full():
+                break
+        if board.winner is None and not board.is_full():
+            positions.append(board)
+    return positions
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def timed(func, min_time=0.05):
+    """Mean time of one call of func in seconds; every call starts from a cold table.
+
+    func is called until min_time seconds have been timed, so calls of a
+    few microseconds are not just timer noise.
+    """
+    calls = 0
+    elapsed = 0.0
+    while elapsed < min_time:
+        game_ai.clear_contexts()
+        start = time.perf_counter()
+        func()
+        elapsed += time.perf_counter() - start
+        calls += 1
+    return elapsed / calls
+
+
+def search_to_depth(board):
+    """Search board at its default depth: unlike a time budget, the work never changes"""
+    depth = game_ai.default_depth(board.geometry)
+    return lambda: game_ai.get_best_move(board, board.current_player, max_depth=depth)
+
+
+def bench_nodes_per_second(positions_per_shape):
+    """Alpha-beta throughput at each shape's default depth from a cold table.
+
+    The node count of a cold fixed-depth search never changes, so the rate
+    is the nodes of one pass over the corpus over its mean time.
+    """
+    results = {}
+    for size, win_length, label in SHAPES:
+        corpus = make_corpus(size, win_length, positions_per_shape, seed=1)
+        depth = game_ai.default_depth(corpus[0].geometry)
+        nodes = 0
+
+        def search_corpus():
+            nonlocal nodes
+            nodes = 0
+            for board in corpus:
+                me = board.bits[board.current_player]
+                opp = board.bits[other(board.current_player)]
+                game_ai.solve(me, opp, board.geometry, depth)
+                nodes += game_ai.search_stats.nodes
+
+        elapsed = timed(search_corpus)
+        results[f"search.nodes_per_second.{label}"] = metric(
+            nodes / elapsed, "nodes/s", True)
+    return results
+
+
+def bench_first_move():
+    """Time to the computer's first move on an empty board at fixed depth"""
+    results = {}
+    for size, win_length, label in SHAPES:
+        elapsed = timed(search_to_depth(Board(size, win_length)))
+        results[f"latency.first_move.{label}"] = metric(1000 * elapsed, "ms", False)
+    return results
+
+
+def bench_move_latency(positions_per_shape):
+    """Per-move latency in ms of a fixed-depth search, per corpus position"""
+    return {label: [1000 * timed(search_to_depth(board))
+                    for board in make_corpus(size, win_length, positions_per_shape, seed=2)]
+            for size, win_length, label in SHAPES}
+
+
+def latency_metrics(samples_by_shape):
+    """Mean, p50, p95 and max of the per-move latencies of each shape"""
+    results = {}
+    for label, samples in samples_by_shape.items():
+        prefix = f"latency.per_move.{label}"
+        results[prefix + ".mean"] = metric(sum(samples) / len(samples), "ms", False)
+        results[prefix + ".p50"] = metric(percentile(samples, 0.5), "ms", False)
+        results[prefix + ".p95"] = metric(percentile(samples, 0.95), "ms", False)
+        results[prefix + ".max"] = metric(max(samples), "ms", False)
+    return results
+
+
+def bench_helpers():
+    """Calls per second of the per-move helpers the apps use"""
+    results = {}
+    helpers = (
+        ("check_winner", lambda board: board.check_winner()),
+        ("get_winning_move", lambda board: game_ai.get_winning_move(board, board.current_player)),
+        ("get_random_move", game_ai.get_random_move),
+    )
+    for size, win_length, label in (SHAPES[0], SHAPES[-1]):
+        corpus = make_corpus(size, win_length, 50, seed=3)
+        for name, helper in helpers:
+            def call_all():
+                for board in corpus:
+                    helper(board)
+            results[f"helpers.{name}.{label}"] = metric(
+                len(corpus) / timed(call_all), "calls/s", True)
+    return results
+
+
+def bench_selfplay(games, seed=0):
+    """Single-process self-play throughput on 3x3, replaying the same games each time"""
+    results = {}
+    for x_strategy, o_strategy in (("hard", "medium"), ("random", "random")):
+        def play():
+            random.seed(seed)
+            selfplay.play_chunk((0, games, x_strategy, o_strategy, 3, None, None))
+        results[f"selfplay.games_per_second.{x_strategy}_vs_{o_strategy}"] = metric(
+            games / timed(play), "games/s", True)
+    return results
+
+
+def merge_round(results, round_results):
+    """Fold one round into results: "value" keeps the best round, "worst" the worst"""
+    for name, result in round_results.items():
+        kept = results.get(name)
+        if kept is None:
+            results[name] = dict(result, worst=result["value"])
+            continue
+        better, worse = ((max, min) if result["higher_is_better"] else (min, max))
+        kept["value"] = better(kept["value"], result["value"])
+        kept["worst"] = worse(kept["worst"], result["value"])
+
+
+def run(quick=False, repeats=5, seed=0):
+    """Run every benchmark and return the JSON-ready report.
+
+    The whole suite runs repeats times. Each metric reports its best round
+    as "value" (per-move latencies: the summary of each position's best
+    time) and its worst round as "worst", the noise band compare() uses.
+    Spreading the repeats over the run, rather than timing one metric
+    several times in a row, also samples the slow spells of the machine
+    that last a few seconds.
+    """
+    scale = 1 if quick else 4
+    results = {}
+    fastest = {}
+    for _ in range(repeats):
+        round_results = {}
+        round_results.update(bench_nodes_per_second(2 * scale))
+        round_results.update(bench_first_move())
+        round_results.update(bench_helpers())
+        round_results.update(bench_selfplay(100 * scale, seed))
+        latencies = bench_move_latency(5 * scale)
+        for label, samples in latencies.items():
+            kept = fastest.get(label, samples)
+            fastest[label] = [min(pair) for pair in zip(kept, samples)]
+        round_results.update(latency_metrics(latencies))
+        merge_round(results, round_results)
+    # Per-move latencies summarise the best time of each position
+    for name, result in latency_metrics(fastest).items():
+        results[name]["value"] = result["value"]
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "quick": quick,
+            "repeats": repeats,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Return lines describing metrics that regressed beyond tolerance.
+
+    A metric regresses only when the best round of this run is worse than
+    the worst round of the baseline by more than tolerance, so ordinary
+    round-to-round noise on either side never counts. Latencies under
+    MIN_GATED_MS are table lookups whose timings are mostly noise; they
+    stay in the report but are not compared, and no latency counts unless
+    it also grew by MIN_GATED_MS.
+    """
+    regressions = []
+    for name, current in report["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if previous is None:
+            continue
+        worst = previous.get("worst", previous["value"])
+        if worst <= 0 or current["value"] <= 0:
+            continue
+        if current["higher_is_better"]:
+            change = worst / current["value"] - 1
+        else:
+            if (max(previous["value"], current["value"]) < MIN_GATED_MS
+                    or current["value"] - worst < MIN_GATED_MS):
+                continue
+            change = current["value"] / worst - 1
+        if change > tolerance:
+            regressions.append(f"{name}: {previous['value']:.4g} (worst round "
+                               f"{worst:.4g}) -> {current['value']:.4g} "
+                               f"{current['unit']} ({100 * change:.0f}% worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the game engine")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="baseline JSON report to check against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown before a metric counts as a regression")
+    parser.add_argument("--repeats", type=int, default=5,
+                        help="rounds of the whole suite; each metric keeps its best")
+    parser.add_argument("--quick", action="store_true", help="smaller corpus and fewer games")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the random strategies")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    report = run(args.quick, args.repeats, args.seed)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print("REGRESSION " + line, file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions beyond "
+              f"{100 * args.tolerance:.0f}% against {args.compare}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
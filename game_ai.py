@@ -0,0 +1,394 @@
+"""Computer move selection on top of the bitboard engine.
+
+The search functions work on raw integer masks so the hot loop never
+touches the Board object or player strings. The search is an alpha-beta
+negamax with hash, killer and history move ordering; its results are kept
+in a per-board-shape transposition table keyed on the canonical form of
+the position under the board symmetries, so the table survives across
+moves and games for the whole session. When the precomputed
+``perfect_play.bin`` table is present, 3x3 best moves are a single lookup.
+
+Small boards are searched to the end. Larger boards are searched to a
+fixed depth and scored with a line-count evaluation at the horizon, and
+only cells next to existing marks are considered.
+"""
+
+import random
+import time
+
+import play_table
+from game_engine import CLASSIC, iter_bits, other, popcount
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+WIN_SCORE = 10 ** 9
+WIN_BOUND = 2 * WIN_SCORE
+
+# Boards with more cells than this only consider cells next to a mark
+MAX_FULL_WIDTH_CELLS = 16
+
+# Think time choices offered by the front-ends: (seconds, label)
+THINK_TIME_PRESETS = (
+    (0.05, "50 ms"),
+    (0.2, "200 ms"),
+    (1.0, "1 s"),
+)
+DEFAULT_THINK_TIME = 0.2
+
+# Strategies understood by choose_move
+DIFFICULTIES = ("random", "easy", "medium", "hard", "mcts")
+
+# How many nodes pass between should_stop checks
+_STOP_CHECK_MASK = 127
+
+
+class SearchAborted(Exception):
+    """Raised inside a search when its should_stop callback fires"""
+
+
+class TranspositionTable:
+    """Search results stored in canonical orientation with a bound flag"""
+
+    def __init__(self):
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def store(self, key, score, flag, cell, draft):
+        self.entries[key] = (score, flag, cell, draft)
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SearchStats:
+    """Counters for the last search, used to measure pruning"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.depth = 0
+
+
+class SearchContext:
+    """Per-board-shape search state kept for the whole session"""
+
+    def __init__(self, geometry):
+        self.geometry = geometry
+        self.table = TranspositionTable()
+        self.killers = {}
+        self.history = [0] * geometry.cells
+        self.should_stop = None
+        self.line_weights = tuple(10 ** count for count in range(geometry.win_length))
+
+
+search_stats = SearchStats()
+_contexts = {}
+
+
+def get_context(geometry=CLASSIC):
+    """Return the shared search state for a board shape"""
+    context = _contexts.get(geometry)
+    if context is None:
+        context = _contexts[geometry] = SearchContext(geometry)
+    return context
+
+
+def clear_contexts():
+    """Forget the search state of every board shape, as in a fresh process"""
+    _contexts.clear()
+
+
+def default_depth(geometry):
+    """Search depth used by get_best_move when none is given"""
+    if geometry.cells <= 9:
+        return geometry.cells
+    if geometry.cells <= MAX_FULL_WIDTH_CELLS:
+        return 6
+    if geometry.cells <= 25:
+        return 4
+    return 2
+
+
+def get_random_move(board):
+    """Get a random available move"""
+    available = board.legal_moves()
+    return random.choice(available) if available else None
+
+
+def get_winning_move(board, player):
+    """Check if player can win in next move"""
+    geometry = board.geometry
+    mine = board.bits[player]
+    for cell in iter_bits(board.empty_mask()):
+        if geometry.wins_at(mine | (1 << cell), cell):
+            return geometry.to_row_col(cell)
+    return None
+
+
+def choose_move(board, player, difficulty, should_stop=None, time_budget=None,
+                mcts_iterations=None):
+    """Pick the computer's move for one of DIFFICULTIES.
+
+    mcts_iterations bounds the "mcts" search by work instead of time;
+    without it or a time budget MCTS thinks for DEFAULT_THINK_TIME.
+    """
+    if board.variant == "ultimate":
+        import ultimate
+        return ultimate.choose_move(board, difficulty, should_stop, time_budget)
+    move = None
+
+    if difficulty == "random":
+        move = get_random_move(board)
+
+    elif difficulty == "easy":
+        # Easy: Random moves with occasional good moves
+        if random.random() < 0.3:
+            move = get_best_move(board, player, should_stop=should_stop,
+                                 time_budget=time_budget)
+        if move is None:
+            move = get_random_move(board)
+
+    elif difficulty == "medium":
+        # Medium: Block player wins, try to win, otherwise random
+        move = get_winning_move(board, player)
+        if move is None:
+            move = get_winning_move(board, other(player))
+        if move is None:
+            move = get_random_move(board)
+
+    elif difficulty == "mcts":
+        # Imported here because mcts builds on this module
+        import mcts
+        move = mcts.get_best_move(board, player, mcts_iterations, time_budget,
+                                  should_stop)
+
+    else:  # hard
+        move = get_best_move(board, player, should_stop=should_stop,
+                             time_budget=time_budget)
+
+    return move
+
+
+def get_best_move(board, player="O", max_depth=None, should_stop=None,
+                  time_budget=None):
+    """Get the best move for player, searching max_depth plies at most.
+
+    With a time_budget in seconds the search deepens one ply at a time and
+    returns the best move of the deepest iteration that finished in time.
+    should_stop, if given, is polled during the search; when it returns
+    True the search raises SearchAborted.
+    """
+    geometry = board.geometry
+    me = board.bits[player]
+    opp = board.bits[other(player)]
+    if board.winner is not None or not geometry.full_mask & ~(me | opp):
+        return None
+    entry = None
+    if geometry is CLASSIC:
+        entry = play_table.lookup(me, opp)
+    if entry is None and time_budget is not None:
+        entry = iterative_deepening(me, opp, geometry, time_budget, should_stop,
+                                    max_depth)
+    elif entry is None:
+        entry = solve(me, opp, geometry, max_depth, should_stop)
+    score, cell = entry
+    return geometry.to_row_col(cell) if cell is not None else None
+
+
+def solve(me, opp, geometry=CLASSIC, depth=None, should_stop=None):
+    """Return (score, best cell) of a live position for the side to move"""
+    if depth is None:
+        depth = default_depth(geometry)
+    context = get_context(geometry)
+    search_stats.reset()
+    context.killers.clear()
+    context.should_stop = should_stop
+    try:
+        result = negamax(context, me, opp, -WIN_BOUND, WIN_BOUND, depth, 0)
+    finally:
+        context.should_stop = None
+    search_stats.depth = depth
+    return result
+
+
+def iterative_deepening(me, opp, geometry=CLASSIC, time_budget=DEFAULT_THINK_TIME,
+                        should_stop=None, max_depth=None):
+    """Search depth 1, 2, ... until time_budget seconds have passed.
+
+    Returns (score, best cell) of the deepest completed iteration and
+    leaves its depth in search_stats.depth. Running out of time ends the
+    search quietly; should_stop firing raises SearchAborted as usual.
+    """
+    context = get_context(geometry)
+    search_stats.reset()
+    context.killers.clear()
+    empty = geometry.full_mask & ~(me | opp)
+    limit = popcount(empty)
+    if max_depth is not None:
+        limit = min(limit, max_depth)
+    deadline = time.monotonic() + time_budget
+
+    def stop():
+        return time.monotonic() >= deadline or (should_stop is not None and should_stop())
+
+    best = None
+    context.should_stop = stop
+    try:
+        for depth in range(1, limit + 1):
+            try:
+                result = negamax(context, me, opp, -WIN_BOUND, WIN_BOUND, depth, 0)
+            except SearchAborted:
+                if should_stop is not None and should_stop():
+                    raise
+                break
+            best = result
+            search_stats.depth = depth
+            if abs(result[0]) >= WIN_SCORE:
+                break
+    finally:
+        context.should_stop = None
+
+    if best is None or best[1] is None:
+        # Not even depth 1 finished: fall back to the most central candidate
+        candidates = _candidates(geometry, me | opp, empty)
+        cell = next(cell for cell in geometry.move_order if candidates >> cell & 1)
+        best = (0, cell)
+    return best
+
+
+def negamax(context, me, opp, alpha, beta, depth, ply):
+    """Alpha-beta negamax over a position where the opponent has not yet won.
+
+    A win scores WIN_SCORE plus the number of cells still empty, so faster
+    wins and slower losses are preferred. Scores depend only on the
+    position and the remaining depth, which keeps transposition table
+    entries valid at any ply.
+    """
+    search_stats.nodes += 1
+    if (context.should_stop is not None and not search_stats.nodes & _STOP_CHECK_MASK
+            and context.should_stop()):
+        raise SearchAborted
+    geometry = context.geometry
+    occupied = me | opp
+    empty = geometry.full_mask & ~occupied
+    if not empty:
+        return 0, None
+
+    candidates = _candidates(geometry, occupied, empty)
+    for cell in iter_bits(candidates):
+        if geometry.wins_at(me | (1 << cell), cell):
+            return WIN_SCORE + popcount(empty), cell
+
+    if depth <= 0:
+        return evaluate(context, me, opp), None
+
+    draft = min(depth, popcount(empty))
+    alpha_orig = alpha
+    key, sym = geometry.canonical(me, opp)
+    entry = context.table.get(key)
+    hash_cell = None
+    if entry is not None:
+        score, flag, canonical_cell, stored_draft = entry
+        hash_cell = geometry.inverse_symmetries[sym][canonical_cell]
+        if stored_draft >= draft:
+            if flag == EXACT:
+                return score, hash_cell
+            if flag == LOWER and score > alpha:
+                alpha = score
+            elif flag == UPPER and score < beta:
+                beta = score
+            if alpha >= beta:
+                return score, hash_cell
+
+    best_score = -WIN_BOUND
+    best_cell = None
+    for cell in _ordered_moves(context, candidates, ply, hash_cell):
+        score = -negamax(context, opp, me | (1 << cell), -beta, -alpha,
+                         depth - 1, ply + 1)[0]
+        if score > best_score:
+            best_score = score
+            best_cell = cell
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    search_stats.cutoffs += 1
+                    _record_cutoff(context, cell, ply, empty)
+                    break
+
+    if best_score <= alpha_orig:
+        flag = UPPER
+    elif best_score >= beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    context.table.store(key, best_score, flag,
+                        geometry.symmetries[sym][best_cell], draft)
+    return best_score, best_cell
+
+
+def evaluate(context, me, opp):
+    """Score a quiet position by the open lines each side is building"""
+    weights = context.line_weights
+    score = 0
+    for line in context.geometry.win_masks:
+        mine = me & line
+        theirs = opp & line
+        if mine:
+            if not theirs:
+                score += weights[popcount(mine)]
+        elif theirs:
+            score -= weights[popcount(theirs)]
+    return score
+
+
+def _candidates(geometry, occupied, empty):
+    """Cells worth searching: all of them on small boards, else those next to a mark"""
+    if geometry.cells <= MAX_FULL_WIDTH_CELLS:
+        return empty
+    if not occupied:
+        return 1 << geometry.move_order[0]
+    near = 0
+    for cell in iter_bits(occupied):
+        near |= geometry.neighbours[cell]
+    return near & empty or empty
+
+
+def _ordered_moves(context, candidates, ply, hash_cell):
+    """Hash move first, then killers, then the rest by history score"""
+    first = []
+    if hash_cell is not None and candidates >> hash_cell & 1:
+        first.append(hash_cell)
+    for cell in context.killers.get(ply, ()):
+        if candidates >> cell & 1 and cell not in first:
+            first.append(cell)
+    rest = [cell for cell in context.geometry.move_order
+            if candidates >> cell & 1 and cell not in first]
+    history = context.history
+    rest.sort(key=lambda cell: -history[cell])
+    return first + rest
+
+
+def _record_cutoff(context, cell, ply, empty):
+    """Remember a move that caused a beta cutoff"""
+    killers = context.killers.setdefault(ply, [])
+    if cell not in killers:
+        killers.insert(0, cell)
+        del killers[2:]
+    context.history[cell] += popcount(empty) ** 2
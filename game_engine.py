@@ -0,0 +1,393 @@
+"""Headless Tic-Tac-Toe engine shared by the Tk and Kivy front-ends.
+
+A position is stored as two integer bitmasks, one per player. Bit
+``row * size + col`` is set when that player owns the cell, so win checks
+and move generation are plain integer operations instead of nested list
+scans and string comparisons.
+
+Boards can be any N x N with K in a row to win. Everything that depends
+only on the board shape (line masks, the lines through each cell,
+symmetries, move order) lives in a Geometry that is built once per size
+and shared by every board and search of that shape.
+"""
+
+PLAYERS = ("X", "O")
+
+# Board shapes offered by the front-ends: (size, win length, label)
+BOARD_PRESETS = (
+    (3, 3, "3x3"),
+    (4, 4, "4x4"),
+    (5, 4, "5x5 (4 in a row)"),
+    (15, 5, "15x15 Gomoku"),
+)
+
+# Symmetry canonicalisation is skipped above this many cells, where the
+# cost of transforming every mask outweighs the extra table hits
+MAX_SYMMETRY_CELLS = 25
+_CHUNK_BITS = 9
+
+
+def other(player):
+    """Return the opponent of player"""
+    return "O" if player == "X" else "X"
+
+
+def iter_bits(mask):
+    """Yield the index of every set bit, lowest first"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+def popcount(mask):
+    """Count the set bits of a mask"""
+    return bin(mask).count("1")
+
+
+class Geometry:
+    """Precomputed tables for one board size and win length"""
+
+    def __init__(self, size, win_length):
+        if not 1 <= win_length <= size:
+            raise ValueError(f"win length {win_length} does not fit a {size}x{size} board")
+        self.size = size
+        self.win_length = win_length
+        self.cells = size * size
+        self.full_mask = (1 << self.cells) - 1
+        self.win_masks = self._build_win_masks()
+        self.line_ids_through = tuple(
+            tuple(i for i, line in enumerate(self.win_masks) if line >> cell & 1)
+            for cell in range(self.cells)
+        )
+        self.lines_through = tuple(
+            tuple(self.win_masks[i] for i in ids) for ids in self.line_ids_through
+        )
+        self.neighbours = self._build_neighbours()
+        self.move_order = self._build_move_order()
+        self.symmetries = self._build_symmetries()
+        self.inverse_symmetries = tuple(
+            tuple(perm.index(cell) for cell in range(self.cells))
+            for perm in self.symmetries
+        )
+        self._symmetry_chunks = self._build_symmetry_chunks()
+
+    def _build_win_masks(self):
+        """Build one bitmask per K-cell window along rows, columns and diagonals"""
+        size, k = self.size, self.win_length
+        masks = []
+        for r in range(size):
+            for c in range(size):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r = r + dr * (k - 1)
+                    end_c = c + dc * (k - 1)
+                    if 0 <= end_r < size and 0 <= end_c < size:
+                        masks.append(sum(1 << ((r + dr * i) * size + c + dc * i)
+                                         for i in range(k)))
+        return tuple(masks)
+
+    def _build_neighbours(self):
+        """Mask of the cells adjacent to each cell, used to prune big boards"""
+        size = self.size
+        neighbours = []
+        for cell in range(self.cells):
+            r, c = divmod(cell, size)
+            mask = 0
+            for nr in range(max(0, r - 1), min(size, r + 2)):
+                for nc in range(max(0, c - 1), min(size, c + 2)):
+                    if (nr, nc) != (r, c):
+                        mask |= 1 << (nr * size + nc)
+            neighbours.append(mask)
+        return tuple(neighbours)
+
+    def _build_move_order(self):
+        """Order cells by how many lines pass through them, then by centrality"""
+        centre = (self.size - 1) / 2
+        def priority(cell):
+            r, c = divmod(cell, self.size)
+            return (-len(self.lines_through[cell]),
+                    abs(r - centre) + abs(c - centre), cell)
+        return tuple(sorted(range(self.cells), key=priority))
+
+    def _build_symmetries(self):
+        """Build the cell permutations of the square (rotations and reflections)"""
+        if self.cells > MAX_SYMMETRY_CELLS:
+            return (tuple(range(self.cells)),)
+        n = self.size - 1
+        transforms = [
+            lambda r, c: (r, c),
+            lambda r, c: (c, n - r),
+            lambda r, c: (n - r, n - c),
+            lambda r, c: (n - c, r),
+            lambda r, c: (r, n - c),
+            lambda r, c: (n - r, c),
+            lambda r, c: (c, r),
+            lambda r, c: (n - c, n - r),
+        ]
+        perms = []
+        for transform in transforms:
+            perm = []
+            for cell in range(self.cells):
+                r, c = transform(*divmod(cell, self.size))
+                perm.append(r * self.size + c)
+            perms.append(tuple(perm))
+        return tuple(perms)
+
+    def _build_symmetry_chunks(self):
+        """Precompute the image of every 9-bit chunk of a mask under every symmetry"""
+        chunks = []
+        for perm in self.symmetries[1:]:
+            tables = []
+            for start in range(0, self.cells, _CHUNK_BITS):
+                width = min(_CHUNK_BITS, self.cells - start)
+                table = []
+                for value in range(1 << width):
+                    image = 0
+                    for bit in iter_bits(value):
+                        image |= 1 << perm[start + bit]
+                    table.append(image)
+                tables.append(tuple(table))
+            chunks.append(tuple(tables))
+        return tuple(chunks)
+
+    def canonical(self, me, opp):
+        """Return (key, symmetry index) of the smallest symmetric image of a position"""
+        best_key = (me << self.cells) | opp
+        best_sym = 0
+        shift = self.cells
+        for sym, tables in enumerate(self._symmetry_chunks, 1):
+            image_me = image_opp = 0
+            m, o = me, opp
+            for table in tables:
+                image_me |= table[m & 0x1FF]
+                image_opp |= table[o & 0x1FF]
+                m >>= _CHUNK_BITS
+                o >>= _CHUNK_BITS
+            key = (image_me << shift) | image_opp
+            if key < best_key:
+                best_key = key
+                best_sym = sym
+        return best_key, best_sym
+
+    def has_win(self, mask):
+        """Check if a player's bitmask contains a complete line anywhere"""
+        for line in self.win_masks:
+            if mask & line == line:
+                return True
+        return False
+
+    def wins_at(self, mask, cell):
+        """Check only the lines through cell, for use right after a move there"""
+        for line in self.lines_through[cell]:
+            if mask & line == line:
+                return True
+        return False
+
+    def to_cell(self, row, col):
+        """Convert a (row, col) pair to a bit index"""
+        return row * self.size + col
+
+    def to_row_col(self, cell):
+        """Convert a bit index to a (row, col) pair"""
+        return divmod(cell, self.size)
+
+
+_geometries = {}
+
+
+def get_geometry(size=3, win_length=None):
+    """Return the shared Geometry for a board shape, building it on first use"""
+    if win_length is None:
+        win_length = min(size, 5)
+    key = (size, win_length)
+    geometry = _geometries.get(key)
+    if geometry is None:
+        geometry = _geometries[key] = Geometry(size, win_length)
+    return geometry
+
+
+# The classic 3x3 game, used by the precomputed perfect-play table
+CLASSIC = get_geometry(3, 3)
+SIZE = CLASSIC.size
+CELLS = CLASSIC.cells
+FULL_MASK = CLASSIC.full_mask
+WIN_MASKS = CLASSIC.win_masks
+
+
+def has_win(mask):
+    """Check if a 3x3 bitmask contains a complete line"""
+    for line in WIN_MASKS:
+        if mask & line == line:
+            return True
+    return False
+
+
+class Board:
+    """A position plus running per-line counters.
+
+    Every move and undo updates the mark count of each line through the
+    changed cell, so finding a winner costs O(lines through that cell) and
+    a full board is just a move counter. Moves made with push are kept on
+    a stack so pop, undo and redo never copy the board. X always moves
+    first, so the side to move follows from the move count.
+    """
+
+    variant = "standard"
+
+    def __init__(self, size=3, win_length=None):
+        self.geometry = get_geometry(size, win_length)
+        self.bits = {"X": 0, "O": 0}
+        self.reset()
+
+    @property
+    def size(self):
+        return self.geometry.size
+
+    @property
+    def win_length(self):
+        return self.geometry.win_length
+
+    def reset(self):
+        """Clear every cell"""
+        line_total = len(self.geometry.win_masks)
+        self.bits["X"] = 0
+        self.bits["O"] = 0
+        self.line_counts = {"X": [0] * line_total, "O": [0] * line_total}
+        self.complete_lines = {"X": 0, "O": 0}
+        self.move_count = 0
+        self.winner = None
+        self.history = []
+        self.redo_moves = []
+
+    @property
+    def current_player(self):
+        """The side to move, assuming the players alternate starting with X"""
+        return "O" if self.move_count % 2 else "X"
+
+    def copy(self):
+        """Return an independent snapshot, e.g. for a background search"""
+        board = Board.__new__(Board)
+        board.geometry = self.geometry
+        board.bits = dict(self.bits)
+        board.line_counts = {player: counts[:] for player, counts in self.line_counts.items()}
+        board.complete_lines = dict(self.complete_lines)
+        board.move_count = self.move_count
+        board.winner = self.winner
+        board.history = self.history[:]
+        board.redo_moves = self.redo_moves[:]
+        return board
+
+    def occupied(self):
+        """Bitmask of all filled cells"""
+        return self.bits["X"] | self.bits["O"]
+
+    def empty_mask(self):
+        """Bitmask of all empty cells"""
+        return self.geometry.full_mask & ~(self.bits["X"] | self.bits["O"])
+
+    def get(self, row, col):
+        """Return "X", "O" or "" for the given cell"""
+        bit = 1 << self.geometry.to_cell(row, col)
+        if self.bits["X"] & bit:
+            return "X"
+        if self.bits["O"] & bit:
+            return "O"
+        return ""
+
+    def is_empty(self, row, col):
+        """Check if the given cell is free"""
+        return not self.occupied() & (1 << self.geometry.to_cell(row, col))
+
+    def is_legal(self, row, col):
+        """Check if the side to move may play the given cell"""
+        return self.winner is None and self.is_empty(row, col)
+
+    def place(self, row, col, player):
+        """Put player's mark on an empty cell and update the lines through it"""
+        cell = self.geometry.to_cell(row, col)
+        self.bits[player] |= 1 << cell
+        self.move_count += 1
+        counts = self.line_counts[player]
+        win_length = self.geometry.win_length
+        for line_id in self.geometry.line_ids_through[cell]:
+            counts[line_id] += 1
+            if counts[line_id] == win_length:
+                self.complete_lines[player] += 1
+        if self.winner is None and self.complete_lines[player]:
+            self.winner = player
+
+    def clear(self, row, col):
+        """Remove any mark from the given cell"""
+        player = self.get(row, col)
+        if not player:
+            return
+        cell = self.geometry.to_cell(row, col)
+        self.bits[player] &= ~(1 << cell)
+        self.move_count -= 1
+        counts = self.line_counts[player]
+        win_length = self.geometry.win_length
+        for line_id in self.geometry.line_ids_through[cell]:
+            if counts[line_id] == win_length:
+                self.complete_lines[player] -= 1
+            counts[line_id] -= 1
+        if self.winner == player and not self.complete_lines[player]:
+            opponent = other(player)
+            self.winner = opponent if self.complete_lines[opponent] else None
+
+    def push(self, move):
+        """Play move, a (row, col) pair, for the side to move"""
+        row, col = move
+        self.place(row, col, self.current_player)
+        self.history.append(move)
+
+    def pop(self):
+        """Take back the last pushed move and return it"""
+        move = self.history.pop()
+        self.clear(*move)
+        return move
+
+    def play(self, move):
+        """Push a new move from a player, discarding any undone moves"""
+        self.push(move)
+        self.redo_moves.clear()
+
+    def can_undo(self):
+        return bool(self.history)
+
+    def can_redo(self):
+        return bool(self.redo_moves)
+
+    def undo(self):
+        """Take back the last move, keeping it for redo"""
+        move = self.pop()
+        self.redo_moves.append(move)
+        return move
+
+    def redo(self):
+        """Replay the most recently undone move"""
+        move = self.redo_moves.pop()
+        self.push(move)
+        return move
+
+    def legal_moves(self):
+        """List all empty cells as (row, col) pairs"""
+        return [self.geometry.to_row_col(cell) for cell in iter_bits(self.empty_mask())]
+
+    def check_winner(self):
+        """Return the winning player, or None"""
+        return self.winner
+
+    def winning_line(self):
+        """End cells of a completed line as two (row, col) pairs, or None"""
+        if self.winner is None:
+            return None
+        mine = self.bits[self.winner]
+        for mask in self.geometry.win_masks:
+            if mine & mask == mask:
+                cells = list(iter_bits(mask))
+                return self.geometry.to_row_col(cells[0]), self.geometry.to_row_col(cells[-1])
+        return None
+
+    def is_full(self):
+        """Check if board is full"""
+        return self.move_count == self.geometry.cells
@@ -0,0 +1,196 @@
+"""Monte Carlo Tree Search (UCT) for large boards.
+
+Full-width alpha-beta cannot see far on 15x15, so this engine grows a
+search tree guided by random playouts instead. Each expanded leaf runs a
+small batch of playouts on raw bitmasks, and the tree is kept between
+moves: the next search starts from the grandchild matching the position
+after the opponent's reply instead of from scratch.
+
+The search is bounded by an iteration count, a time budget, or both.
+"""
+
+import math
+import random
+import time
+
+import game_ai
+from game_engine import iter_bits, other, popcount
+
+EXPLORATION = 1.4
+PLAYOUTS_PER_LEAF = 4
+
+
+class Node:
+    """A position in the tree, stored from the side to move's point of view"""
+
+    __slots__ = ("me", "opp", "move", "parent", "children", "untried",
+                 "visits", "value", "terminal")
+
+    def __init__(self, me, opp, move, parent, untried, terminal):
+        self.me = me
+        self.opp = opp
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        # Sum of results for the player who made self.move: 1 win, 0.5 draw
+        self.value = 0.0
+        self.terminal = terminal
+
+    def best_child(self, exploration):
+        """Child with the highest UCT score"""
+        log_visits = math.log(self.visits)
+        best = None
+        best_score = -1.0
+        for child in self.children:
+            score = (child.value / child.visits
+                     + exploration * math.sqrt(log_visits / child.visits))
+            if score > best_score:
+                best_score = score
+                best = child
+        return best
+
+
+class MCTSPlayer:
+    """UCT search state for one board shape, reused from move to move"""
+
+    def __init__(self, geometry, exploration=EXPLORATION,
+                 playouts_per_leaf=PLAYOUTS_PER_LEAF):
+        self.geometry = geometry
+        self.exploration = exploration
+        self.playouts_per_leaf = playouts_per_leaf
+        self.root = None
+        self.iterations = 0
+
+    def _new_node(self, me, opp, move, parent):
+        """Create a node for the position reached by move (None for a root)"""
+        geometry = self.geometry
+        terminal = None
+        if move is not None and geometry.wins_at(opp, move):
+            terminal = 0.0  # the side to move has lost
+        elif not geometry.full_mask & ~(me | opp):
+            terminal = 0.5
+        untried = 0
+        if terminal is None:
+            untried = game_ai._candidates(geometry, me | opp,
+                                          geometry.full_mask & ~(me | opp))
+        return Node(me, opp, move, parent, untried, terminal)
+
+    def _find_root(self, me, opp):
+        """Reuse the subtree for this position if the last search reached it"""
+        if self.root is not None:
+            frontier = [self.root]
+            for _ in range(3):
+                for node in frontier:
+                    if node.me == me and node.opp == opp:
+                        node.parent = None
+                        return node
+                frontier = [child for node in frontier for child in node.children]
+        return self._new_node(me, opp, None, None)
+
+    def search(self, me, opp, iterations=None, time_budget=None, should_stop=None):
+        """Grow the tree from (me, opp) and return the most visited move cell"""
+        if iterations is None and time_budget is None:
+            time_budget = game_ai.DEFAULT_THINK_TIME
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        root = self.root = self._find_root(me, opp)
+
+        count = 0
+        while iterations is None or count < iterations:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if should_stop is not None and should_stop():
+                raise game_ai.SearchAborted
+            self._iterate(root)
+            count += 1
+        self.iterations = count
+        game_ai.search_stats.reset()
+        game_ai.search_stats.nodes = count
+
+        if not root.children:
+            # Pick without adding an unvisited node to the kept tree
+            return random.choice(list(iter_bits(root.untried)))
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _iterate(self, root):
+        """One selection, expansion, simulation and backpropagation pass"""
+        node = root
+        while not node.untried and node.children:
+            node = node.best_child(self.exploration)
+        if node.terminal is None and node.untried:
+            node = self._expand(node)
+
+        if node.terminal is not None:
+            visits = 1
+            result = 1.0 - node.terminal
+        else:
+            visits = self.playouts_per_leaf
+            result = 0.0
+            for _ in range(visits):
+                result += self._playout(node.me, node.opp)
+            # _playout scores the side to move; the node's mover is the other side
+            result = visits - result
+
+        while node is not None:
+            node.visits += visits
+            node.value += result
+            result = visits - result
+            node = node.parent
+
+    def _expand(self, node):
+        """Add one random untried child"""
+        cells = list(iter_bits(node.untried))
+        cell = random.choice(cells)
+        node.untried &= ~(1 << cell)
+        child = self._new_node(node.opp, node.me | (1 << cell), cell, node)
+        node.children.append(child)
+        return child
+
+    def _playout(self, me, opp):
+        """Play random moves to the end; return the side to move's result"""
+        geometry = self.geometry
+        cells = list(iter_bits(geometry.full_mask & ~(me | opp)))
+        random.shuffle(cells)
+        players = [me, opp]
+        turn = 0
+        for cell in cells:
+            mask = players[turn] | (1 << cell)
+            players[turn] = mask
+            if geometry.wins_at(mask, cell):
+                return 1.0 if turn == 0 else 0.0
+            turn ^= 1
+        return 0.5
+
+
+_players = {}
+
+
+def get_player(geometry):
+    """Return the shared MCTS state for a board shape"""
+    player = _players.get(geometry)
+    if player is None:
+        player = _players[geometry] = MCTSPlayer(geometry)
+    return player
+
+
+def clear_players():
+    """Forget the kept search trees of every board shape"""
+    _players.clear()
+
+
+def get_best_move(board, player="O", iterations=None, time_budget=None,
+                  should_stop=None):
+    """Get player's move by MCTS, taking immediate wins and blocks directly"""
+    geometry = board.geometry
+    me = board.bits[player]
+    opp = board.bits[other(player)]
+    if board.winner is not None or popcount(me | opp) == geometry.cells:
+        return None
+    move = game_ai.get_winning_move(board, player)
+    if move is None:
+        move = game_ai.get_winning_move(board, other(player))
+    if move is not None:
+        return move
+    cell = get_player(geometry).search(me, opp, iterations, time_budget, should_stop)
+    return geometry.to_row_col(cell)
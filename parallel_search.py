@@ -0,0 +1,182 @@
+"""Multi-core search for server-side analysis of big positions.
+
+Two modes share a process pool:
+
+* Root splitting: each legal root move is scored by a separate alpha-beta
+  search of the resulting position, spread across the workers.
+* Root-parallel MCTS: every worker grows its own tree from the root with a
+  different seed and the visit counts of the root moves are summed.
+
+Run as a script to measure how each mode scales with the worker count:
+
+    python parallel_search.py --size 15 --win-length 5 --workers 1 2 4 8
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import game_ai
+import mcts
+from game_engine import Board, get_geometry, iter_bits, other, popcount
+
+_pools = {}
+
+
+def get_pool(workers):
+    """Return a process pool of the given size, kept for reuse"""
+    pool = _pools.get(workers)
+    if pool is None:
+        pool = _pools[workers] = ProcessPoolExecutor(max_workers=workers)
+    return pool
+
+
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def _score_root_move(task):
+    """Score one root move by searching the reply position; runs in a worker"""
+    size, win_length, me, opp, cell, depth, time_budget = task
+    geometry = get_geometry(size, win_length)
+    mine = me | (1 << cell)
+    if geometry.wins_at(mine, cell):
+        # Scored as negamax does, counting the empty cells before the move
+        return cell, game_ai.WIN_SCORE + popcount(geometry.full_mask & ~(me | opp)), 0
+    if not geometry.full_mask & ~(mine | opp):
+        return cell, 0, 0
+    if time_budget is not None:
+        score, _ = game_ai.iterative_deepening(opp, mine, geometry, time_budget,
+                                               max_depth=depth)
+    else:
+        score, _ = game_ai.solve(opp, mine, geometry, depth)
+    return cell, -score, game_ai.search_stats.nodes
+
+
+def _run_mcts(task):
+    """Grow an independent MCTS tree; runs in a worker.
+
+    Returns the worker's chosen cell and the root visit counts, which are
+    empty if the budget ran out before the first iteration.
+    """
+    size, win_length, me, opp, seed, iterations, time_budget = task
+    random.seed(seed)
+    player = mcts.MCTSPlayer(get_geometry(size, win_length))
+    cell = player.search(me, opp, iterations, time_budget)
+    return cell, {child.move: child.visits for child in player.root.children}
+
+
+def root_split_best_move(board, player="O", workers=None, depth=None, time_budget=None):
+    """Alpha-beta with the root moves searched in parallel.
+
+    Each root move gets depth - 1 plies (default game_ai.default_depth), or
+    time_budget seconds of iterative deepening. Returns (move, nodes).
+    """
+    geometry = board.geometry
+    me = board.bits[player]
+    opp = board.bits[other(player)]
+    if board.winner is not None or board.is_full():
+        return None, 0
+    if depth is None:
+        depth = game_ai.default_depth(geometry)
+    candidates = game_ai._candidates(geometry, me | opp, geometry.full_mask & ~(me | opp))
+    tasks = [(geometry.size, geometry.win_length, me, opp, cell, max(depth - 1, 0),
+              time_budget)
+             for cell in iter_bits(candidates)]
+    pool = get_pool(workers or os.cpu_count() or 1)
+    best_cell, best_score, nodes = None, None, 0
+    for cell, score, searched in pool.map(_score_root_move, tasks):
+        nodes += searched
+        if best_score is None or score > best_score:
+            best_cell, best_score = cell, score
+    return geometry.to_row_col(best_cell), nodes
+
+
+def root_parallel_mcts(board, player="O", workers=None, iterations=None,
+                       time_budget=None, seed=0):
+    """MCTS with one tree per worker and merged root visit counts.
+
+    iterations is the total across all workers. Immediate wins and blocks
+    are played without searching, as mcts.get_best_move does. Returns
+    (move, visits).
+    """
+    geometry = board.geometry
+    me = board.bits[player]
+    opp = board.bits[other(player)]
+    if board.winner is not None or board.is_full():
+        return None, 0
+    move = game_ai.get_winning_move(board, player)
+    if move is None:
+        move = game_ai.get_winning_move(board, other(player))
+    if move is not None:
+        return move, 0
+    workers = workers or os.cpu_count() or 1
+    per_worker = None if iterations is None else max(1, iterations // workers)
+    if per_worker is None and time_budget is None:
+        time_budget = game_ai.DEFAULT_THINK_TIME
+    tasks = [(geometry.size, geometry.win_length, me, opp, seed + i, per_worker,
+              time_budget)
+             for i in range(workers)]
+    results = list(get_pool(workers).map(_run_mcts, tasks))
+    visits = {}
+    for _, counts in results:
+        for cell, count in counts.items():
+            visits[cell] = visits.get(cell, 0) + count
+    # No worker finished an iteration: take the first worker's own pick
+    best_cell = max(visits, key=visits.get) if visits else results[0][0]
+    return geometry.to_row_col(best_cell), sum(visits.values())
+
+
+def benchmark_position(size, win_length, moves=4, seed=0):
+    """A reproducible mid-opening position for scaling runs"""
+    rng = random.Random(seed)
+    board = Board(size, win_length)
+    centre = size // 2
+    for _ in range(moves):
+        near = [(r, c) for r, c in board.legal_moves()
+                if abs(r - centre) <= 2 and abs(c - centre) <= 2]
+        board.push(rng.choice(near))
+    return board
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure parallel search scaling")
+    parser.add_argument("--size", type=int, default=5)
+    parser.add_argument("--win-length", type=int, default=4)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument("--depth", type=int, default=None,
+                        help="alpha-beta depth (default: game_ai.default_depth)")
+    parser.add_argument("--iterations", type=int, default=4000,
+                        help="total MCTS iterations per run")
+    args = parser.parse_args(argv)
+
+    board = benchmark_position(args.size, args.win_length)
+    player = board.current_player
+    baseline = {}
+    print(f"{args.size}x{args.size}, {args.win_length} in a row")
+    print(f"{'mode':<12}{'workers':>8}{'seconds':>10}{'speedup':>9}{'work':>10}")
+    for workers in sorted(set(args.workers)):
+        # Warm the pool so process start-up is not timed
+        list(get_pool(workers).map(abs, range(workers)))
+        for mode in ("root-split", "mcts"):
+            start = time.perf_counter()
+            if mode == "root-split":
+                _, work = root_split_best_move(board, player, workers, args.depth)
+            else:
+                _, work = root_parallel_mcts(board, player, workers, args.iterations)
+            elapsed = time.perf_counter() - start
+            baseline.setdefault(mode, elapsed)
+            print(f"{mode:<12}{workers:>8}{elapsed:>10.3f}"
+                  f"{baseline[mode] / elapsed:>8.2f}x{work:>10}")
+    shutdown_pools()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
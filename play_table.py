@@ -0,0 +1,110 @@
+"""Precomputed perfect-play table for the 3x3 game.
+
+Running this module solves every position reachable from the empty board
+and writes ``perfect_play.bin``. At runtime the file is memory-mapped and
+each lookup is a single byte read.
+
+File layout (little endian, fixed size):
+
+    offset 0   4 bytes   magic b"TTTP"
+    offset 4   1 byte    format version
+    offset 5   1 byte    board size (3)
+    offset 6   2 bytes   reserved, zero
+    offset 8   3**9 bytes, one entry per position
+
+A position is indexed from the side to move's point of view: every cell
+contributes 3**cell times 0 (empty), 1 (side to move) or 2 (opponent).
+An entry packs ``(outcome + 1) << 4 | best_cell`` where outcome is 1, 0 or
+-1 for the side to move; 0xFF marks positions that are terminal or
+unreachable. The best cell is the fastest win or slowest loss.
+"""
+
+import mmap
+import os
+import struct
+
+from game_engine import CELLS, FULL_MASK, SIZE, has_win, iter_bits
+
+MAGIC = b"TTTP"
+VERSION = 1
+HEADER = struct.Struct("<4sBBH")
+EMPTY_ENTRY = 0xFF
+ENTRY_COUNT = 3 ** CELLS
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "perfect_play.bin")
+
+# Base-3 weight of every 9-bit mask, so an index is two table reads
+BASE3 = tuple(sum(3 ** cell for cell in iter_bits(mask))
+               for mask in range(FULL_MASK + 1))
+
+_table = None
+_load_attempted = False
+
+
+def index_of(me, opp):
+    """Return the table index of a position, seen from the side to move"""
+    return BASE3[me] + 2 * BASE3[opp]
+
+
+def load(path=TABLE_PATH):
+    """Memory-map the table file, returning None if it is missing or invalid"""
+    try:
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(data) != HEADER.size + ENTRY_COUNT:
+        data.close()
+        return None
+    magic, version, size, _ = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or size != SIZE:
+        data.close()
+        return None
+    return data
+
+
+def lookup(me, opp):
+    """Return (outcome, best cell) for the side to move, or None if not stored"""
+    global _table, _load_attempted
+    if not _load_attempted:
+        _load_attempted = True
+        _table = load()
+    if _table is None:
+        return None
+    entry = _table[HEADER.size + index_of(me, opp)]
+    if entry == EMPTY_ENTRY:
+        return None
+    return (entry >> 4) - 1, entry & 0x0F
+
+
+def build(path=TABLE_PATH):
+    """Solve every reachable position and write the table file"""
+    from game_ai import solve
+
+    entries = bytearray([EMPTY_ENTRY]) * ENTRY_COUNT
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        me, opp = stack.pop()
+        if (me, opp) in seen:
+            continue
+        seen.add((me, opp))
+        if has_win(opp) or not FULL_MASK & ~(me | opp):
+            continue
+        score, cell = solve(me, opp)
+        outcome = (score > 0) - (score < 0)
+        entries[index_of(me, opp)] = ((outcome + 1) << 4) | cell
+        for move in iter_bits(FULL_MASK & ~(me | opp)):
+            stack.append((opp, me | (1 << move)))
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, SIZE, 0))
+        f.write(entries)
+    os.replace(tmp_path, path)
+    return len(seen)
+
+
+if __name__ == "__main__":
+    count = build()
+    print(f"Wrote {TABLE_PATH} ({count} positions)")
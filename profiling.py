@@ -0,0 +1,166 @@
+"""Opt-in sampling profiler for the game loop, UI refreshes and AI calls.
+
+Enable it with the TICTACTOE_PROFILE environment variable (its value is
+the output directory, or "1" for ./profiles) or with a --profile flag:
+
+    TICTACTOE_PROFILE=1 python tic_tac_toe.py
+    python tic_tac_toe.py --profile
+    python Mobile_tic_tac_toe.py -- --profile   # Kivy wants app args after --
+
+The entry points wrap their event handlers, refresh methods and AI calls
+with named sections. While a thread is inside a section a background
+thread samples its stack every few milliseconds. On exit two files are
+written:
+
+* profile-<time>.collapsed: one "thread;section;frame;... count" line per
+  distinct stack, ready for flamegraph.pl or speedscope.
+* profile-<time>.txt: call counts and wall times per section, plus the
+  functions seen most often in the samples.
+"""
+
+import atexit
+import functools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+ENV_VAR = "TICTACTOE_PROFILE"
+FLAG = "--profile"
+DEFAULT_DIR = "profiles"
+SAMPLE_INTERVAL = 0.005
+
+
+def requested_dir(argv=None, environ=None):
+    """Output directory if profiling was asked for, else None"""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+    value = environ.get(ENV_VAR, "")
+    if value in ("", "0"):
+        return DEFAULT_DIR if FLAG in argv[1:] else None
+    return DEFAULT_DIR if value == "1" else value
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    def __init__(self, output_dir, interval=SAMPLE_INTERVAL):
+        self.output_dir = output_dir
+        self.interval = interval
+        self.samples = Counter()
+        self.timings = {}  # section -> [calls, total seconds, max seconds]
+        self._active = {}  # thread id -> (section, frame of the outermost wrapper)
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._thread = None
+
+    def wrap(self, section, func):
+        """Return func wrapped so calls are timed and sampled under section"""
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            thread_id = threading.get_ident()
+            outermost = thread_id not in self._active
+            if outermost:
+                self._active[thread_id] = (section, sys._getframe())
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                if outermost:
+                    del self._active[thread_id]
+                with self._lock:
+                    timing = self.timings.setdefault(section, [0, 0.0, 0.0])
+                    timing[0] += 1
+                    timing[1] += elapsed
+                    timing[2] = max(timing[2], elapsed)
+        return wrapper
+
+    def instrument(self, owner, names, prefix):
+        """Replace owner.name (a class or module attribute) with a wrapped version"""
+        for name in names:
+            func = getattr(owner, name, None)
+            if func is not None:
+                setattr(owner, name, self.wrap(f"{prefix}:{name}", func))
+
+    def start(self):
+        self._running.set()
+        self._thread = threading.Thread(target=self._sample_loop, name="profiler",
+                                        daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def _sample_loop(self):
+        names = {}
+        while self._running.is_set():
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            for thread_id, (section, top) in list(self._active.items()):
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and frame is not top:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack.append(section)
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """Stop sampling and write the report files; safe to call twice"""
+        if not self._running.is_set():
+            return None
+        self._running.clear()
+        self._thread.join()
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, time.strftime("profile-%Y%m%d-%H%M%S"))
+        with open(base + ".collapsed", "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+        with open(base + ".txt", "w") as f:
+            f.write(self.format_summary())
+        return base
+
+    def format_summary(self, top=30):
+        lines = [f"Sections (sampled every {1000 * self.interval:.0f} ms)",
+                 f"{'section':<32}{'calls':>8}{'total ms':>11}{'mean ms':>10}{'max ms':>9}"]
+        for section, (calls, total, longest) in sorted(
+                self.timings.items(), key=lambda item: -item[1][1]):
+            lines.append(f"{section:<32}{calls:>8}{1000 * total:>11.1f}"
+                         f"{1000 * total / calls:>10.2f}{1000 * longest:>9.1f}")
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.samples.items():
+            frames = stack.split(";")[2:]
+            if frames:
+                own[frames[-1]] += count
+            for name in set(frames):
+                inclusive[name] += count
+        total_samples = sum(self.samples.values()) or 1
+        for title, counter in (("Self samples", own), ("Inclusive samples", inclusive)):
+            lines.append("")
+            lines.append(f"{title} (of {total_samples})")
+            for name, count in counter.most_common(top):
+                lines.append(f"{count:>8} {100 * count / total_samples:>6.1f}%  {name}")
+        return "\n".join(lines) + "\n"
+
+
+def start_from_environment(targets, argv=None, environ=None):
+    """Start profiling if requested; targets are (owner, method names, prefix).
+
+    Returns the running SamplingProfiler, or None when profiling is off.
+    """
+    output_dir = requested_dir(argv, environ)
+    if output_dir is None:
+        return None
+    profiler = SamplingProfiler(output_dir)
+    for owner, names, prefix in targets:
+        profiler.instrument(owner, names, prefix)
+    profiler.start()
+    return profiler
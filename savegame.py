@@ -0,0 +1,143 @@
+"""Compact binary snapshots of a game in progress.
+
+The Kivy app writes one when Android pauses it and when it stops, and
+reads it back on start, so a process killed in the background resumes
+into the same game. A snapshot is a fixed header followed by the move
+history, the undone moves and the two bitboards, one byte per move:
+
+    python -c "import savegame; print(savegame.load('savegame.bin'))"
+
+The bitboards are redundant with the history; restore() replays the
+moves and rejects the snapshot if they disagree. Files are replaced
+atomically, so a crash while saving leaves the previous snapshot intact.
+"""
+
+import logging
+import os
+import struct
+from collections import namedtuple
+
+import game_ai
+from game_engine import PLAYERS, Board
+
+logger = logging.getLogger("tictactoe.save")
+
+MAGIC = b"TTTS"
+VERSION = 1
+
+SavedGame = namedtuple(
+    "SavedGame",
+    "variant size win_length x_bits o_bits to_move history redo_moves game_active "
+    "game_mode difficulty next_size next_win_length ultimate_mode think_time "
+    "sounds_enabled player_score computer_score friend_score")
+
+# magic, version, flags, size, win_length, to_move, game_mode, difficulty,
+# next_size, next_win_length, think_time, three scores, history length,
+# redo length, bytes per bitboard
+HEADER = struct.Struct("<4sBBBBBBBBBdIIIHHB")
+
+ULTIMATE, GAME_ACTIVE, ULTIMATE_MODE, SOUNDS_ENABLED = 1, 2, 4, 8
+GAME_MODES = (None, "computer", "friend")
+
+
+def snapshot(board, **fields):
+    """SavedGame of board plus the front-end fields given by keyword"""
+    if board.variant == "ultimate":
+        # UltimateBoard keeps (index, previous next_board) pairs on its stack
+        from ultimate import join
+        history = [join(*divmod(index, 9)) for index, _ in board.history]
+    else:
+        history = list(board.history)
+    return SavedGame(board.variant, board.size, board.win_length,
+                     board.bits["X"], board.bits["O"], history=history,
+                     redo_moves=list(board.redo_moves), **fields)
+
+
+def encode(saved):
+    """Pack a SavedGame into bytes"""
+    flags = ((ULTIMATE if saved.variant == "ultimate" else 0)
+             | (GAME_ACTIVE if saved.game_active else 0)
+             | (ULTIMATE_MODE if saved.ultimate_mode else 0)
+             | (SOUNDS_ENABLED if saved.sounds_enabled else 0))
+    width = (saved.size * saved.size + 7) // 8
+    header = HEADER.pack(
+        MAGIC, VERSION, flags, saved.size, saved.win_length,
+        PLAYERS.index(saved.to_move), GAME_MODES.index(saved.game_mode),
+        game_ai.DIFFICULTIES.index(saved.difficulty),
+        saved.next_size, saved.next_win_length, saved.think_time,
+        saved.player_score, saved.computer_score, saved.friend_score,
+        len(saved.history), len(saved.redo_moves), width)
+    moves = bytes(row * saved.size + col
+                  for row, col in saved.history + saved.redo_moves)
+    return (header + moves + saved.x_bits.to_bytes(width, "little")
+            + saved.o_bits.to_bytes(width, "little"))
+
+
+def decode(data):
+    """Unpack bytes written by encode; raises ValueError if they are not a snapshot"""
+    if len(data) < HEADER.size:
+        raise ValueError("snapshot is truncated")
+    (magic, version, flags, size, win_length, to_move, game_mode, difficulty,
+     next_size, next_win_length, think_time, player_score, computer_score,
+     friend_score, history_length, redo_length, width) = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} snapshot")
+    moves_end = HEADER.size + history_length + redo_length
+    if len(data) != moves_end + 2 * width:
+        raise ValueError("snapshot has the wrong length")
+    moves = [divmod(cell, size) for cell in data[HEADER.size:moves_end]]
+    try:
+        return SavedGame(
+            "ultimate" if flags & ULTIMATE else "standard", size, win_length,
+            int.from_bytes(data[moves_end:moves_end + width], "little"),
+            int.from_bytes(data[moves_end + width:], "little"),
+            PLAYERS[to_move], moves[:history_length], moves[history_length:],
+            bool(flags & GAME_ACTIVE), GAME_MODES[game_mode],
+            game_ai.DIFFICULTIES[difficulty], next_size, next_win_length,
+            bool(flags & ULTIMATE_MODE), think_time, bool(flags & SOUNDS_ENABLED),
+            player_score, computer_score, friend_score)
+    except IndexError:
+        raise ValueError("snapshot has an unknown field value") from None
+
+
+def restore(saved):
+    """Rebuild the board of a SavedGame by replaying its moves"""
+    if saved.variant == "ultimate":
+        from ultimate import UltimateBoard
+        board = UltimateBoard()
+    else:
+        board = Board(saved.size, saved.win_length)
+    try:
+        for move in saved.history:
+            if not board.is_legal(*move):
+                raise ValueError(f"illegal move {move} in snapshot")
+            board.push(move)
+    except IndexError:
+        raise ValueError("move outside the board in snapshot") from None
+    if (board.bits["X"], board.bits["O"]) != (saved.x_bits, saved.o_bits):
+        raise ValueError("snapshot bitboards do not match its moves")
+    board.redo_moves = list(saved.redo_moves)
+    return board
+
+
+def save(path, saved):
+    """Write a snapshot atomically: a temporary file, fsync, then rename"""
+    data = encode(saved)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def load(path):
+    """Read a snapshot in one call; None if there is none or it is unusable"""
+    try:
+        with open(path, "rb") as f:
+            return decode(f.read())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning("Ignoring saved game %s: %s", path, e)
+        return None
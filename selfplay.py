@@ -0,0 +1,111 @@
+"""Headless AI-vs-AI self-play for tuning difficulty levels.
+
+Plays many games between two strategies across a process pool and
+streams win/draw/loss statistics as chunks of games finish:
+
+    python selfplay.py --games 100000 --x hard --o medium --workers 8
+
+Every chunk of games gets its own seed derived from --seed and starts
+with empty search tables. Without --think-time alpha-beta searches to a
+fixed depth and MCTS runs MCTS_ITERATIONS iterations, so a run is
+reproducible for a given seed, chunk size and strategy pair whatever the
+worker count. Timed searches depend on machine speed and are not.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import game_ai
+import mcts
+from game_engine import Board
+
+# MCTS iterations per move when no think time is given
+MCTS_ITERATIONS = 2000
+
+
+def play_game(x_strategy, o_strategy, size=3, win_length=None, time_budget=None):
+    """Play one game and return "X", "O" or "draw" """
+    board = Board(size, win_length)
+    strategies = {"X": x_strategy, "O": o_strategy}
+    iterations = MCTS_ITERATIONS if time_budget is None else None
+    while board.winner is None and not board.is_full():
+        player = board.current_player
+        move = game_ai.choose_move(board, player, strategies[player],
+                                   time_budget=time_budget,
+                                   mcts_iterations=iterations)
+        board.push(move)
+    return board.winner or "draw"
+
+
+def play_chunk(task):
+    """Play a chunk of games with its own seed; return (X wins, O wins, draws)"""
+    seed, games, x_strategy, o_strategy, size, win_length, time_budget = task
+    random.seed(seed)
+    # A worker runs several chunks: start each from empty search state so
+    # the results do not depend on which chunks shared a process
+    game_ai.clear_contexts()
+    mcts.clear_players()
+    results = {"X": 0, "O": 0, "draw": 0}
+    for _ in range(games):
+        results[play_game(x_strategy, o_strategy, size, win_length, time_budget)] += 1
+    return results["X"], results["O"], results["draw"]
+
+
+def make_tasks(games, chunk_size, seed, x_strategy, o_strategy, size, win_length,
+               time_budget):
+    """Split games into chunks, each with a distinct seed"""
+    tasks = []
+    for index, start in enumerate(range(0, games, chunk_size)):
+        count = min(chunk_size, games - start)
+        tasks.append((seed * 1_000_003 + index, count, x_strategy, o_strategy,
+                      size, win_length, time_budget))
+    return tasks
+
+
+def format_stats(x_wins, o_wins, draws, elapsed):
+    """One line of running totals"""
+    played = x_wins + o_wins + draws
+    rate = played / elapsed if elapsed > 0 else 0.0
+    return (f"{played} games | X {x_wins} ({100 * x_wins / played:.1f}%) | "
+            f"O {o_wins} ({100 * o_wins / played:.1f}%) | "
+            f"draw {draws} ({100 * draws / played:.1f}%) | {rate:,.0f} games/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play AI-vs-AI games headlessly")
+    parser.add_argument("--games", type=int, default=10000, help="number of games")
+    parser.add_argument("--x", default="hard", choices=game_ai.DIFFICULTIES,
+                        help="strategy playing X (moves first)")
+    parser.add_argument("--o", default="medium", choices=game_ai.DIFFICULTIES,
+                        help="strategy playing O")
+    parser.add_argument("--size", type=int, default=3, help="board size")
+    parser.add_argument("--win-length", type=int, default=None,
+                        help="marks in a row needed to win")
+    parser.add_argument("--think-time", type=float, default=None,
+                        help="seconds per searched move (default: fixed work)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="worker processes")
+    parser.add_argument("--chunk", type=int, default=1000, help="games per task")
+    parser.add_argument("--seed", type=int, default=0, help="base random seed")
+    args = parser.parse_args(argv)
+
+    tasks = make_tasks(args.games, args.chunk, args.seed, args.x, args.o,
+                       args.size, args.win_length, args.think_time)
+    x_wins = o_wins = draws = 0
+    start = time.perf_counter()
+    with multiprocessing.Pool(args.workers) as pool:
+        for x, o, d in pool.imap_unordered(play_chunk, tasks):
+            x_wins += x
+            o_wins += o
+            draws += d
+            print(format_stats(x_wins, o_wins, draws, time.perf_counter() - start),
+                  flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
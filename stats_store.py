@@ -0,0 +1,233 @@
+"""Persistent win/loss/draw statistics in a local SQLite database.
+
+Every finished game is a row in ``games``; ``totals`` keeps the running
+aggregate per (mode, difficulty) so start-up reads one small table
+instead of scanning the history. The database is opened in WAL mode.
+
+The front-ends never touch the database. The writer thread opens it and
+loads the totals into an in-memory cache, which the menus read; until
+that load finishes the cache holds only this session's games. record()
+updates the cache and queues the row for the writer, which commits
+everything queued within BATCH_WINDOW in one transaction. Results are from X's side: "win" means
+the human beat the computer, or Player X beat Player O.
+"""
+
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+logger = logging.getLogger("tictactoe.stats")
+
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".tictactoe-stats.db")
+
+# Seconds the writer waits for more results before committing a batch
+BATCH_WINDOW = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    finished_at REAL NOT NULL,
+    mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    board TEXT NOT NULL,
+    result TEXT NOT NULL,
+    moves INTEGER NOT NULL,
+    seconds REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    wins INTEGER NOT NULL,
+    losses INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    seconds REAL NOT NULL,
+    streak INTEGER NOT NULL,
+    best_streak INTEGER NOT NULL,
+    PRIMARY KEY (mode, difficulty)
+);
+"""
+
+# streak is positive for consecutive wins and negative for consecutive
+# losses; a draw ends either. best_streak is the longest run of wins.
+Totals = namedtuple("Totals", "wins losses draws seconds streak best_streak")
+
+EMPTY = Totals(0, 0, 0, 0.0, 0, 0)
+
+# Queue markers for the writer thread
+_FLUSH = object()
+_CLOSE = object()
+_RESET = object()
+
+
+def connect(path):
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def add_result(totals, result, seconds):
+    """Totals after one more game with result "win", "loss" or "draw" """
+    wins, losses, draws, total_seconds, streak, best_streak = totals
+    if result == "win":
+        wins += 1
+        streak = streak + 1 if streak > 0 else 1
+        best_streak = max(best_streak, streak)
+    elif result == "loss":
+        losses += 1
+        streak = streak - 1 if streak < 0 else -1
+    else:
+        draws += 1
+        streak = 0
+    return Totals(wins, losses, draws, total_seconds + seconds, streak, best_streak)
+
+
+class StatsStore:
+    """Statistics cache in memory, written to SQLite by a background thread"""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.cache = {}
+        self.lock = threading.Lock()
+        self.pending = queue.Queue()
+        self.loaded = threading.Event()
+        # Cache changes made before the load, replayed onto the stored
+        # totals: (key, result, seconds) per game, None for a reset
+        self.early = []
+        # Totals as committed, kept by the writer thread
+        self.written = {}
+        self.thread = threading.Thread(target=self.run, name="stats", daemon=True)
+        self.thread.start()
+
+    def record(self, mode, difficulty, winner, seconds, board, moves):
+        """Count a finished game; winner is "X", "O" or "draw" """
+        difficulty = difficulty if mode == "computer" else ""
+        result = {"X": "win", "O": "loss"}.get(winner, "draw")
+        key = (mode, difficulty)
+        with self.lock:
+            self.cache[key] = add_result(self.cache.get(key, EMPTY), result, seconds)
+            if not self.loaded.is_set():
+                self.early.append((key, result, seconds))
+        self.pending.put((time.time(), mode, difficulty, board, result, moves, seconds))
+
+    def totals(self, mode, difficulty=None):
+        """Cached Totals for a mode, summed over difficulties unless one is given"""
+        with self.lock:
+            if difficulty is not None:
+                return self.cache.get((mode, difficulty), EMPTY)
+            rows = [totals for (row_mode, _), totals in self.cache.items()
+                    if row_mode == mode]
+        if not rows:
+            return EMPTY
+        return Totals(sum(t.wins for t in rows), sum(t.losses for t in rows),
+                      sum(t.draws for t in rows), sum(t.seconds for t in rows),
+                      0, max(t.best_streak for t in rows))
+
+    def summary(self, mode):
+        """One line for the menus, e.g. "All time: 5W 2L 1D, best streak 3, avg 21 s" """
+        totals = self.totals(mode)
+        games = totals.wins + totals.losses + totals.draws
+        if not games:
+            return "All time: no games yet"
+        if mode == "friend":
+            return (f"All time: X {totals.wins}, O {totals.losses}, "
+                    f"{totals.draws} drawn, avg {totals.seconds / games:.0f} s")
+        return (f"All time: {totals.wins}W {totals.losses}L {totals.draws}D, "
+                f"best streak {totals.best_streak}, "
+                f"avg {totals.seconds / games:.0f} s")
+
+    def reset(self):
+        """Forget every statistic"""
+        with self.lock:
+            self.cache.clear()
+            if not self.loaded.is_set():
+                self.early.append(None)
+        self.pending.put(_RESET)
+
+    def flush(self, wait=True):
+        """Commit queued results now, waiting for the commit unless wait is False"""
+        self.pending.put(_FLUSH)
+        if wait:
+            self.pending.join()
+
+    def close(self):
+        """Commit queued results and stop the writer thread"""
+        if self.thread.is_alive():
+            self.pending.put(_CLOSE)
+            self.thread.join()
+
+    def load(self):
+        """Open the database and merge its totals into the cache; None on failure"""
+        connection = None
+        try:
+            connection = connect(self.path)
+            for row in connection.execute("SELECT * FROM totals"):
+                self.written[row[0], row[1]] = Totals(*row[2:])
+        except sqlite3.Error as e:
+            logger.warning("Statistics in %s are unavailable: %s", self.path, e)
+            if connection is not None:
+                connection.close()
+                connection = None
+        with self.lock:
+            cache = dict(self.written)
+            for change in self.early:
+                if change is None:
+                    cache.clear()
+                else:
+                    key, result, seconds = change
+                    cache[key] = add_result(cache.get(key, EMPTY), result, seconds)
+            self.cache = cache
+            self.early = []
+            self.loaded.set()
+        return connection
+
+    def run(self):
+        connection = self.load()
+        while True:
+            batch = [self.pending.get()]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while batch[-1] not in (_FLUSH, _CLOSE):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            if connection is not None:
+                try:
+                    self.write(connection, batch)
+                except sqlite3.Error as e:
+                    logger.warning("Could not save statistics: %s", e)
+            for _ in batch:
+                self.pending.task_done()
+            if batch[-1] is _CLOSE:
+                if connection is not None:
+                    connection.close()
+                return
+
+    def write(self, connection, batch):
+        """Apply one batch of queued items in a single transaction"""
+        written = dict(self.written)
+        with connection:
+            for item in batch:
+                if item is _RESET:
+                    written.clear()
+                    connection.execute("DELETE FROM games")
+                    connection.execute("DELETE FROM totals")
+                elif item not in (_FLUSH, _CLOSE):
+                    _, mode, difficulty, _, result, _, seconds = item
+                    key = (mode, difficulty)
+                    totals = written[key] = add_result(written.get(key, EMPTY),
+                                                       result, seconds)
+                    connection.execute("INSERT INTO games (finished_at, mode, difficulty, "
+                                       "board, result, moves, seconds) "
+                                       "VALUES (?, ?, ?, ?, ?, ?, ?)", item)
+                    connection.execute("INSERT OR REPLACE INTO totals "
+                                       "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", key + totals)
+        self.written = written
@@ -0,0 +1,58 @@
+import random
+
+import pytest
+
+from game_engine import Board
+
+
+def state(board):
+    return (dict(board.bits), {player: counts[:] for player, counts in board.line_counts.items()},
+            dict(board.complete_lines), board.move_count, board.winner)
+
+
+def rebuilt(board):
+    """A fresh board with the same moves pushed, for comparing derived counters"""
+    fresh = Board(board.size, board.win_length)
+    for move in board.history:
+        fresh.push(move)
+    return fresh
+
+
+@pytest.mark.parametrize("size, win_length", [(3, 3), (4, 4), (5, 4), (7, 5)])
+def test_undo_redo_keep_line_counters_exact(size, win_length):
+    rng = random.Random(size)
+    for _ in range(30):
+        board = Board(size, win_length)
+        # Keep playing past a win so counters with several complete lines are covered
+        while not board.is_full():
+            board.play(rng.choice(board.legal_moves()))
+            assert state(board) == state(rebuilt(board))
+        while board.can_undo():
+            board.undo()
+            assert state(board) == state(rebuilt(board))
+        while board.can_redo():
+            board.redo()
+            assert state(board) == state(rebuilt(board))
+
+
+def test_play_discards_undone_moves():
+    board = Board()
+    for move in [(0, 0), (1, 1), (2, 2)]:
+        board.play(move)
+    assert board.undo() == (2, 2)
+    assert board.can_redo()
+    board.play((0, 2))
+    assert not board.can_redo()
+    assert board.history == [(0, 0), (1, 1), (0, 2)]
+
+
+def test_winner_follows_undo():
+    board = Board()
+    for move in [(0, 0), (1, 0), (0, 1), (1, 1), (0, 2)]:
+        board.play(move)
+    assert board.winner == "X"
+    assert board.winning_line() == ((0, 0), (0, 2))
+    board.undo()
+    assert board.winner is None
+    board.redo()
+    assert board.winner == "X"
@@ -0,0 +1,71 @@
+import random
+
+import pytest
+
+import savegame
+from game_engine import Board
+from ultimate import UltimateBoard
+
+FIELDS = dict(to_move="O", game_active=True, game_mode="computer", difficulty="hard",
+              next_size=4, next_win_length=4, ultimate_mode=False, think_time=0.2,
+              sounds_enabled=True, player_score=3, computer_score=70000, friend_score=0)
+
+
+def played(board, moves, undo=0, seed=0):
+    rng = random.Random(seed)
+    for _ in range(moves):
+        board.play(rng.choice(board.legal_moves()))
+    for _ in range(undo):
+        board.undo()
+    return board
+
+
+@pytest.mark.parametrize("board", [
+    played(Board(), 3),
+    played(Board(15, 5), 20, undo=4),
+    played(UltimateBoard(), 15, undo=2),
+])
+def test_round_trip(board):
+    saved = savegame.snapshot(board, **FIELDS)
+    assert savegame.decode(savegame.encode(saved)) == saved
+    restored = savegame.restore(saved)
+    assert restored.bits == board.bits
+    assert restored.move_count == board.move_count
+    assert restored.redo_moves == board.redo_moves
+    assert savegame.snapshot(restored, **FIELDS) == saved
+
+
+def test_save_and_load_file(tmp_path):
+    path = str(tmp_path / "savegame.bin")
+    saved = savegame.snapshot(played(Board(), 4), **FIELDS)
+    savegame.save(path, saved)
+    assert savegame.load(path) == saved
+    assert not (tmp_path / "savegame.bin.tmp").exists()
+
+
+def test_missing_file_loads_as_none(tmp_path):
+    assert savegame.load(str(tmp_path / "absent.bin")) is None
+
+
+@pytest.mark.parametrize("damage", [
+    lambda data: data[:10],
+    lambda data: b"XXXX" + data[4:],
+    lambda data: data + b"\0",
+    lambda data: data[:9] + b"\x07" + data[10:],  # unknown game mode
+])
+def test_damaged_file_loads_as_none(tmp_path, damage):
+    path = tmp_path / "savegame.bin"
+    path.write_bytes(damage(savegame.encode(savegame.snapshot(played(Board(), 4), **FIELDS))))
+    assert savegame.load(str(path)) is None
+
+
+def test_restore_rejects_bits_that_disagree_with_the_moves():
+    saved = savegame.snapshot(played(Board(), 4), **FIELDS)
+    with pytest.raises(ValueError):
+        savegame.restore(saved._replace(x_bits=saved.x_bits ^ 1 << 8))
+
+
+def test_restore_rejects_illegal_moves():
+    saved = savegame.snapshot(played(Board(), 2), **FIELDS)
+    with pytest.raises(ValueError):
+        savegame.restore(saved._replace(history=saved.history[:1] * 2))
@@ -0,0 +1,71 @@
+import random
+
+from game_engine import FULL_MASK, has_win
+from ultimate import SUB_O, SUB_OPEN, SUB_X, UltimateBoard, join, split, sub_status
+
+
+def state(board):
+    return (dict(board.bits), board.sub_status[:], dict(board.meta), board.closed,
+            board.next_board, board.move_count, board.winner, board.history[:])
+
+
+def random_game(board, rng):
+    """Push random legal moves until the game ends; return the states seen before each"""
+    states = []
+    while board.winner is None and not board.is_full():
+        states.append(state(board))
+        board.push_index(rng.choice(board.legal_cells()))
+    return states
+
+
+def test_pop_index_restores_every_earlier_state():
+    rng = random.Random(1)
+    for _ in range(100):
+        board = UltimateBoard()
+        states = random_game(board, rng)
+        for before in reversed(states):
+            board.pop_index()
+            assert state(board) == before
+
+
+def test_undo_redo_replays_the_same_game():
+    rng = random.Random(2)
+    board = UltimateBoard()
+    random_game(board, rng)
+    final = state(board)
+    moves = [board.undo() for _ in range(board.move_count)]
+    assert state(board) == state(UltimateBoard())
+    assert board.sub_status == [SUB_OPEN] * 9
+    for _ in moves:
+        board.redo()
+    assert state(board) == final
+
+
+def test_move_is_sent_to_the_matching_small_board():
+    board = UltimateBoard()
+    board.play(join(4, 2))
+    assert board.next_board == 2
+    assert all(split(*move)[0] == 2 for move in board.legal_moves())
+    assert not board.is_legal(*join(4, 3))
+
+
+def test_statuses_match_a_recount_from_the_bits():
+    rng = random.Random(3)
+    winners = set()
+    for _ in range(100):
+        board = UltimateBoard()
+        random_game(board, rng)
+        for index in range(9):
+            x = (board.bits["X"] >> 9 * index) & FULL_MASK
+            o = (board.bits["O"] >> 9 * index) & FULL_MASK
+            assert board.sub_status[index] == sub_status(x, o)
+        meta = {player: sum(1 << index for index in range(9)
+                            if board.sub_status[index] == status)
+                for player, status in (("X", SUB_X), ("O", SUB_O))}
+        assert meta == board.meta
+        if board.winner is not None:
+            assert has_win(meta[board.winner])
+        else:
+            assert board.is_full() and not has_win(meta["X"]) and not has_win(meta["O"])
+        winners.add(board.winner)
+    assert winners == {"X", "O", None}
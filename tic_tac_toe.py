@@ -1,8 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
-import random
+import logging
 import time
 
+import ai_stats
+import game_ai
+import profiling
+import stats_store
+from ai_worker import AIWorker
+from game_engine import BOARD_PRESETS, Board
+from ultimate import SUB_O, SUB_OPEN, SUB_X, UltimateBoard
+
 class TicTacToeGame:
     def __init__(self):
         self.root = tk.Tk()
@@ -12,32 +20,75 @@ class TicTacToeGame:
         self.root.resizable(False, False)
         
         # Game state
-        self.board = [["" for _ in range(3)] for _ in range(3)]
+        self.board = Board()
         self.current_player = "X"
         self.game_mode = None  # "computer" or "friend"
         self.difficulty = "medium"  # "easy", "medium", "hard"
+        self.board_size = 3
+        self.win_length = 3
+        self.ultimate_mode = False  # nine linked 3x3 boards instead of one
+        self.think_time = game_ai.DEFAULT_THINK_TIME  # seconds per computer move
         self.player_score = 0
         self.computer_score = 0
         self.friend_score = 0
         self.game_active = False
+        self.game_started = time.monotonic()
+        
+        # All-time statistics, saved by a background thread
+        self.stats = stats_store.StatsStore()
         
         # Sound effects (placeholder - would need pygame or similar for actual sounds)
         self.sounds_enabled = True
         
+        # Computer moves are searched on a background thread
+        self.ai_worker = AIWorker()
+        
+        # Debug key: log the computer's move latency histogram
+        self.root.bind('<F12>', lambda event: ai_stats.dump())
+        
+        # Each screen is built once, on first use, and swapped in and out
+        self.screens = {}
+        self.current_screen = None
+        self.board_shape = None  # (variant, size) the cell buttons were built for
+        
         self.setup_main_menu()
         
+    def show_screen(self, name):
+        """Swap the visible screen, building it the first time it is shown"""
+        screen = self.screens.get(name)
+        if screen is None:
+            screen = self.screens[name] = tk.Frame(self.root, bg='#2C3E50')
+            getattr(self, f"build_{name}_screen")(screen)
+        if self.current_screen is not screen:
+            if self.current_screen is not None:
+                self.current_screen.pack_forget()
+            screen.pack(fill='both', expand=True)
+            self.current_screen = screen
+        
     def setup_main_menu(self):
-        """Create the main menu interface"""
-        self.clear_window()
+        """Show the main menu"""
+        self.ai_worker.cancel()
+        self.show_screen("menu")
         
+        # Score display
+        if self.friend_score > 0:
+            score_text = f"Score - Player 1: {self.player_score} | Player 2: {self.friend_score}"
+        else:
+            score_text = f"Score - You: {self.player_score} | Computer: {self.computer_score}"
+        # All-time figures come from the stats cache, never from the database
+        mode = "friend" if self.friend_score > 0 else "computer"
+        self.menu_score_label.config(text=f"{score_text}\n{self.stats.summary(mode)}")
+        
+    def build_menu_screen(self, screen):
+        """Create the main menu interface"""
         # Title
-        title = tk.Label(self.root, text="Ultimate Tic-Tac-Toe", 
+        title = tk.Label(screen, text="Ultimate Tic-Tac-Toe", 
                         font=("Arial", 24, "bold"), 
                         fg='#ECF0F1', bg='#2C3E50')
         title.pack(pady=30)
         
         # Subtitle with animation effect
-        subtitle = tk.Label(self.root, text="Choose your battle!", 
+        subtitle = tk.Label(screen, text="Choose your battle!", 
                            font=("Arial", 12), 
                            fg='#BDC3C7', bg='#2C3E50')
         subtitle.pack(pady=10)
@@ -52,51 +103,48 @@ class TicTacToeGame:
         }
         
         # Play vs Computer button
-        vs_computer_btn = tk.Button(self.root, text="🤖 Play vs Computer", 
+        vs_computer_btn = tk.Button(screen, text="🤖 Play vs Computer", 
                                    bg='#3498DB', fg='white',
                                    command=self.show_difficulty_selection,
                                    **button_style)
         vs_computer_btn.pack(pady=10)
         
         # Play vs Friend button  
-        vs_friend_btn = tk.Button(self.root, text="👥 Play vs Friend", 
+        vs_friend_btn = tk.Button(screen, text="👥 Play vs Friend", 
                                  bg='#2ECC71', fg='white',
                                  command=self.start_friend_game,
                                  **button_style)
         vs_friend_btn.pack(pady=10)
         
         # Settings button
-        settings_btn = tk.Button(self.root, text="⚙️ Settings", 
+        settings_btn = tk.Button(screen, text="⚙️ Settings", 
                                bg='#95A5A6', fg='white',
                                command=self.show_settings,
                                **button_style)
         settings_btn.pack(pady=10)
         
         # How to Play button
-        help_btn = tk.Button(self.root, text="❓ How to Play", 
+        help_btn = tk.Button(screen, text="❓ How to Play", 
                            bg='#9B59B6', fg='white',
                            command=self.show_help,
                            **button_style)
         help_btn.pack(pady=10)
         
-        # Score display
-        if self.friend_score > 0:
-            score_text = f"Score - Player 1: {self.player_score} | Player 2: {self.friend_score}"
-        else:
-            score_text = f"Score - You: {self.player_score} | Computer: {self.computer_score}"
-        
-        score_label = tk.Label(self.root, text=score_text,
-                              font=("Arial", 10),
-                              fg='#BDC3C7', bg='#2C3E50')
-        score_label.pack(side=tk.BOTTOM, pady=20)
+        # Score display, filled in by setup_main_menu
+        self.menu_score_label = tk.Label(screen, text="",
+                                        font=("Arial", 10),
+                                        fg='#BDC3C7', bg='#2C3E50')
+        self.menu_score_label.pack(side=tk.BOTTOM, pady=20)
         
     def show_difficulty_selection(self):
         """Show difficulty selection screen"""
-        self.clear_window()
         self.game_mode = "computer"
+        self.show_screen("difficulty")
         
+    def build_difficulty_screen(self, screen):
+        """Create the difficulty selection interface"""
         # Header
-        header = tk.Label(self.root, text="Choose Difficulty", 
+        header = tk.Label(screen, text="Choose Difficulty", 
                          font=("Arial", 20, "bold"), 
                          fg='#ECF0F1', bg='#2C3E50')
         header.pack(pady=30)
@@ -105,11 +153,12 @@ class TicTacToeGame:
         difficulties = [
             ("😊 Easy", "easy", "#2ECC71", "I'm learning too!"),
             ("🤔 Medium", "medium", "#F39C12", "Let's have fun!"),
-            ("😈 Hard", "hard", "#E74C3C", "Prepare to lose!")
+            ("😈 Hard", "hard", "#E74C3C", "Prepare to lose!"),
+            ("🎲 Monte Carlo", "mcts", "#1ABC9C", "Best on big boards!")
         ]
         
         for text, diff, color, desc in difficulties:
-            frame = tk.Frame(self.root, bg='#2C3E50')
+            frame = tk.Frame(screen, bg='#2C3E50')
             frame.pack(pady=10)
             
             btn = tk.Button(frame, text=text,
@@ -126,7 +175,7 @@ class TicTacToeGame:
             desc_label.pack(pady=5)
         
         # Back button
-        back_btn = tk.Button(self.root, text="← Back to Menu",
+        back_btn = tk.Button(screen, text="← Back to Menu",
                             font=("Arial", 12),
                             bg='#95A5A6', fg='white',
                             command=self.setup_main_menu,
@@ -151,50 +200,41 @@ class TicTacToeGame:
         self.setup_game_board()
         
     def setup_game_board(self):
-        """Create the game board interface"""
-        self.clear_window()
+        """Show the game screen for the current board, reusing its cell buttons"""
         self.game_active = True
+        self.show_screen("game")
+        if self.board_shape != (self.board.variant, self.board.size):
+            self.build_board_grid()
+        else:
+            self.refresh_board()
+        self.turn_label.config(text=self.get_turn_text())
+        self.score_label.config(text=self.get_score_text())
         
+    def build_game_screen(self, screen):
+        """Create the game board interface"""
         # Header frame
-        header_frame = tk.Frame(self.root, bg='#2C3E50')
+        header_frame = tk.Frame(screen, bg='#2C3E50')
         header_frame.pack(pady=10, fill='x')
         
         # Turn indicator
-        turn_text = self.get_turn_text()
-        self.turn_label = tk.Label(header_frame, text=turn_text,
+        self.turn_label = tk.Label(header_frame, text="",
                                   font=("Arial", 16, "bold"),
                                   fg='#ECF0F1', bg='#2C3E50')
         self.turn_label.pack()
         
         # Score display
-        score_text = self.get_score_text()
-        self.score_label = tk.Label(header_frame, text=score_text,
+        self.score_label = tk.Label(header_frame, text="",
                                    font=("Arial", 12),
                                    fg='#BDC3C7', bg='#2C3E50')
         self.score_label.pack()
         
-        # Game board frame
-        board_frame = tk.Frame(self.root, bg='#2C3E50')
-        board_frame.pack(pady=20)
-        
-        # Create 3x3 grid of buttons
+        # Game board frame, filled by build_board_grid
+        self.board_frame = tk.Frame(screen, bg='#2C3E50')
+        self.board_frame.pack(pady=20)
         self.buttons = []
-        for i in range(3):
-            row = []
-            for j in range(3):
-                btn = tk.Button(board_frame, text="", 
-                               font=("Arial", 20, "bold"),
-                               width=4, height=2,
-                               bg='#34495E', fg='white',
-                               relief='raised', bd=2,
-                               cursor='hand2',
-                               command=lambda r=i, c=j: self.make_move(r, c))
-                btn.grid(row=i, column=j, padx=2, pady=2)
-                row.append(btn)
-            self.buttons.append(row)
             
         # Control buttons
-        control_frame = tk.Frame(self.root, bg='#2C3E50')
+        control_frame = tk.Frame(screen, bg='#2C3E50')
         control_frame.pack(pady=20)
         
         new_game_btn = tk.Button(control_frame, text="New Game",
@@ -211,15 +251,70 @@ class TicTacToeGame:
                             relief='flat', cursor='hand2')
         menu_btn.pack(side=tk.LEFT, padx=10)
         
+        undo_btn = tk.Button(control_frame, text="↶ Undo",
+                            font=("Arial", 12),
+                            bg='#F39C12', fg='white',
+                            command=self.undo_move,
+                            relief='flat', cursor='hand2')
+        undo_btn.pack(side=tk.LEFT, padx=10)
+        
+        redo_btn = tk.Button(control_frame, text="↷ Redo",
+                            font=("Arial", 12),
+                            bg='#F39C12', fg='white',
+                            command=self.redo_move,
+                            relief='flat', cursor='hand2')
+        redo_btn.pack(side=tk.LEFT, padx=10)
+        
+    def build_board_grid(self):
+        """Create the cell buttons; only needed when the board shape changes"""
+        for row in self.buttons:
+            for btn in row:
+                btn.destroy()
+                
+        # Create size x size grid of buttons, shrinking cells on big boards;
+        # in Ultimate mode a wider gap separates the nine small boards
+        size = self.board.size
+        ultimate = self.board.variant == "ultimate"
+        self.board_shape = (self.board.variant, size)
+        cell_font = max(8, 60 // size)
+        cell_width = max(2, 12 // size)
+        cell_height = 2 if size <= 4 else 1
+        cell_pad = 2 if size <= 5 else 1
+        self.buttons = []
+        for i in range(size):
+            row = []
+            for j in range(size):
+                btn = tk.Button(self.board_frame, text="", 
+                               font=("Arial", cell_font, "bold"),
+                               width=cell_width, height=cell_height,
+                               bg='#34495E', fg='white',
+                               relief='raised', bd=2,
+                               cursor='hand2',
+                               command=lambda r=i, c=j: self.player_move(r, c))
+                gap_x = 4 if ultimate and j and j % 3 == 0 else 0
+                gap_y = 4 if ultimate and i and i % 3 == 0 else 0
+                btn.grid(row=i, column=j, padx=(cell_pad + gap_x, cell_pad),
+                         pady=(cell_pad + gap_y, cell_pad))
+                row.append(btn)
+            self.buttons.append(row)
+        self.update_cell_colors()
+        
+    def player_move(self, row, col):
+        """Handle a click on a cell, ignoring it while the computer is thinking"""
+        if self.game_mode == "computer" and self.current_player == "O":
+            return
+        self.make_move(row, col)
+        
     def make_move(self, row, col):
         """Handle player move"""
-        if not self.game_active or self.board[row][col] != "":
+        if not self.game_active or not self.board.is_legal(row, col):
             return
             
         # Make the move
-        self.board[row][col] = self.current_player
+        self.board.play((row, col))
         self.buttons[row][col].config(text=self.current_player,
                                      fg='#E74C3C' if self.current_player == 'X' else '#3498DB')
+        self.update_cell_colors()
         
         # Play sound effect (placeholder)
         if self.sounds_enabled:
@@ -240,127 +335,110 @@ class TicTacToeGame:
         
         # Computer move if needed
         if self.game_mode == "computer" and self.current_player == "O" and self.game_active:
-            self.root.after(500, self.computer_move)  # Delay for better UX
+            self.computer_move()
             
     def computer_move(self):
-        """Handle computer move based on difficulty"""
-        if not self.game_active:
+        """Start searching for the computer's move in the background"""
+        if not self.game_active or self.current_player != "O":
             return
-            
-        move = None
-        
-        if self.difficulty == "easy":
-            # Easy: Random moves with occasional good moves
-            if random.random() < 0.3:
-                move = self.get_best_move()
-            if move is None:
-                move = self.get_random_move()
-                
-        elif self.difficulty == "medium":
-            # Medium: Block player wins, try to win, otherwise random
-            move = self.get_winning_move("O")  # Try to win
-            if move is None:
-                move = self.get_winning_move("X")  # Block player
-            if move is None:
-                move = self.get_random_move()
-                
-        else:  # hard
-            # Hard: Use minimax algorithm for optimal play
-            move = self.get_best_move()
-            
+        future, generation = self.ai_worker.submit(self.board, "O", self.difficulty,
+                                                   self.think_time)
+        # The delay for better UX runs while the search does
+        self.root.after(500, self.finish_computer_move, future, generation)
+        
+    def finish_computer_move(self, future, generation):
+        """Play the searched move once it is ready, unless it went stale"""
+        if not self.ai_worker.is_current(generation) or not self.game_active:
+            return
+        if not future.done():
+            self.root.after(20, self.finish_computer_move, future, generation)
+            return
+        error = future.exception()
+        if error is not None:
+            # Keep the game going rather than leave it stuck on the computer's turn
+            ai_stats.logger.error("Computer move search failed", exc_info=error)
+            move = game_ai.get_random_move(self.board)
+        else:
+            move = future.result()
+            ai_stats.emit(self.ai_worker.last_stats)
         if move:
             row, col = move
             self.make_move(row, col)
             
+    def undo_move(self):
+        """Take back the last move (and the computer's reply)"""
+        if not self.game_active or not self.board.can_undo():
+            return
+        self.ai_worker.cancel()
+        self.board.undo()
+        # Against the computer, rewind to the player's turn
+        while (self.game_mode == "computer" and self.board.current_player == "O"
+               and self.board.can_undo()):
+            self.board.undo()
+        self.current_player = self.board.current_player
+        self.refresh_board()
+        
+    def redo_move(self):
+        """Replay the last undone move (and the computer's reply)"""
+        if not self.game_active or not self.board.can_redo():
+            return
+        self.board.redo()
+        if (self.game_mode == "computer" and self.board.current_player == "O"
+                and self.board.can_redo()):
+            self.board.redo()
+        self.current_player = self.board.current_player
+        self.refresh_board()
+        
+        if self.check_winner():
+            self.end_game(self.check_winner())
+        elif self.is_board_full():
+            self.end_game("draw")
+        elif self.game_mode == "computer" and self.current_player == "O":
+            self.computer_move()
+            
+    def refresh_board(self):
+        """Redraw every cell button and the turn indicator from the board"""
+        for i, row in enumerate(self.buttons):
+            for j, btn in enumerate(row):
+                cell = self.board.get(i, j)
+                btn.config(text=cell, fg='#E74C3C' if cell == 'X' else '#3498DB')
+        self.update_cell_colors()
+        self.update_turn_display()
+        
+    def update_cell_colors(self):
+        """In Ultimate mode, shade won small boards and highlight playable ones"""
+        if self.board.variant != "ultimate":
+            return
+        active = self.board.active_boards()
+        for i, row in enumerate(self.buttons):
+            for j, btn in enumerate(row):
+                sub_board = self.board.sub_board_of(i, j)
+                status = self.board.sub_status[sub_board]
+                if status == SUB_X:
+                    bg = '#6E2C2C'
+                elif status == SUB_O:
+                    bg = '#1F3A5F'
+                elif status == SUB_OPEN and active >> sub_board & 1:
+                    bg = '#4A6A88'
+                else:
+                    bg = '#34495E'
+                btn.config(bg=bg)
+            
     def get_random_move(self):
         """Get a random available move"""
-        available = [(i, j) for i in range(3) for j in range(3) if self.board[i][j] == ""]
-        return random.choice(available) if available else None
+        return game_ai.get_random_move(self.board)
         
     def get_winning_move(self, player):
         """Check if player can win in next move"""
-        for i in range(3):
-            for j in range(3):
-                if self.board[i][j] == "":
-                    self.board[i][j] = player
-                    if self.check_winner():
-                        self.board[i][j] = ""
-                        return (i, j)
-                    self.board[i][j] = ""
-        return None
-        
-    def get_best_move(self):
-        """Get the best move using minimax algorithm"""
-        best_score = float('-inf')
-        best_move = None
-        
-        for i in range(3):
-            for j in range(3):
-                if self.board[i][j] == "":
-                    self.board[i][j] = "O"
-                    score = self.minimax(0, False)
-                    self.board[i][j] = ""
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_move = (i, j)
-                        
-        return best_move
-        
-    def minimax(self, depth, is_maximizing):
-        """Minimax algorithm for optimal play"""
-        winner = self.check_winner()
-        if winner == "O":
-            return 1
-        elif winner == "X":
-            return -1
-        elif self.is_board_full():
-            return 0
-            
-        if is_maximizing:
-            best_score = float('-inf')
-            for i in range(3):
-                for j in range(3):
-                    if self.board[i][j] == "":
-                        self.board[i][j] = "O"
-                        score = self.minimax(depth + 1, False)
-                        self.board[i][j] = ""
-                        best_score = max(score, best_score)
-            return best_score
-        else:
-            best_score = float('inf')
-            for i in range(3):
-                for j in range(3):
-                    if self.board[i][j] == "":
-                        self.board[i][j] = "X"
-                        score = self.minimax(depth + 1, True)
-                        self.board[i][j] = ""
-                        best_score = min(score, best_score)
-            return best_score
-            
+        return game_ai.get_winning_move(self.board, player)
+        
     def check_winner(self):
         """Check if there's a winner"""
-        # Check rows
-        for row in self.board:
-            if row[0] == row[1] == row[2] != "":
-                return row[0]
-                
-        # Check columns
-        for col in range(3):
-            if self.board[0][col] == self.board[1][col] == self.board[2][col] != "":
-                return self.board[0][col]
-                
-        # Check diagonals
-        if self.board[0][0] == self.board[1][1] == self.board[2][2] != "":
-            return self.board[0][0]
-        if self.board[0][2] == self.board[1][1] == self.board[2][0] != "":
-            return self.board[0][2]
-            
-        return None
+        return self.board.check_winner()
         
     def is_board_full(self):
         """Check if board is full"""
-        return all(cell != "" for row in self.board for cell in row)
+        return self.board.is_full()
         
     def end_game(self, winner):
         """Handle game end"""
@@ -395,6 +473,10 @@ class TicTacToeGame:
                     # Victory sound would be played here
                     pass
         
+        self.stats.record(self.game_mode, self.difficulty, winner,
+                          time.monotonic() - self.game_started,
+                          ai_stats.board_label(self.board), self.board.move_count)
+        
         # Show result dialog
         result = messagebox.askquestion("Game Over", 
                                        message + "\n\nPlay again?",
@@ -412,9 +494,20 @@ class TicTacToeGame:
         
     def reset_board(self):
         """Reset the game board"""
-        self.board = [["" for _ in range(3)] for _ in range(3)]
+        self.ai_worker.cancel()
+        if self.ultimate_mode:
+            if self.board.variant != "ultimate":
+                self.board = UltimateBoard()
+            else:
+                self.board.reset()
+        elif (self.board.variant, self.board.size, self.board.win_length) != (
+                "standard", self.board_size, self.win_length):
+            self.board = Board(self.board_size, self.win_length)
+        else:
+            self.board.reset()
         self.current_player = "X"
         self.game_active = True
+        self.game_started = time.monotonic()
         
     def get_turn_text(self):
         """Get current turn display text"""
@@ -437,16 +530,19 @@ class TicTacToeGame:
             
     def show_settings(self):
         """Show settings screen"""
-        self.clear_window()
+        self.show_screen("settings")
+        self.update_settings_buttons()
         
+    def build_settings_screen(self, screen):
+        """Create the settings interface"""
         # Header
-        header = tk.Label(self.root, text="Settings", 
+        header = tk.Label(screen, text="Settings", 
                          font=("Arial", 20, "bold"), 
                          fg='#ECF0F1', bg='#2C3E50')
         header.pack(pady=30)
         
         # Settings frame
-        settings_frame = tk.Frame(self.root, bg='#2C3E50')
+        settings_frame = tk.Frame(screen, bg='#2C3E50')
         settings_frame.pack(pady=20)
         
         # Sound effects toggle
@@ -456,14 +552,60 @@ class TicTacToeGame:
         tk.Label(sound_frame, text="Sound Effects:", 
                 font=("Arial", 12), fg='#ECF0F1', bg='#2C3E50').pack(side='left')
         
-        sound_btn = tk.Button(sound_frame, 
-                             text="ON" if self.sounds_enabled else "OFF",
-                             font=("Arial", 10),
-                             bg='#2ECC71' if self.sounds_enabled else '#E74C3C',
-                             fg='white', width=8,
-                             command=self.toggle_sound,
-                             relief='flat', cursor='hand2')
-        sound_btn.pack(side='right')
+        self.sound_btn = tk.Button(sound_frame, 
+                                  font=("Arial", 10),
+                                  fg='white', width=8,
+                                  command=self.toggle_sound,
+                                  relief='flat', cursor='hand2')
+        self.sound_btn.pack(side='right')
+        
+        # Ultimate mode toggle
+        ultimate_frame = tk.Frame(settings_frame, bg='#2C3E50')
+        ultimate_frame.pack(pady=10, fill='x')
+        
+        tk.Label(ultimate_frame, text="Ultimate Mode (3x3 of 3x3):", 
+                font=("Arial", 12), fg='#ECF0F1', bg='#2C3E50').pack(side='left')
+        
+        self.ultimate_btn = tk.Button(ultimate_frame, 
+                                     font=("Arial", 10),
+                                     fg='white', width=8,
+                                     command=self.toggle_ultimate,
+                                     relief='flat', cursor='hand2')
+        self.ultimate_btn.pack(side='right')
+        
+        # Board size selection
+        size_frame = tk.Frame(settings_frame, bg='#2C3E50')
+        size_frame.pack(pady=10, fill='x')
+        
+        tk.Label(size_frame, text="Board Size:", 
+                font=("Arial", 12), fg='#ECF0F1', bg='#2C3E50').pack(anchor='w')
+        
+        self.size_buttons = {}
+        for size, win_length, label in BOARD_PRESETS:
+            size_btn = tk.Button(size_frame, text=label,
+                                font=("Arial", 10),
+                                fg='white',
+                                command=lambda s=size, k=win_length: self.set_board_size(s, k),
+                                relief='flat', cursor='hand2')
+            size_btn.pack(side='left', padx=2)
+            self.size_buttons[(size, win_length)] = size_btn
+        
+        # Think time selection
+        think_frame = tk.Frame(settings_frame, bg='#2C3E50')
+        think_frame.pack(pady=10, fill='x')
+        
+        tk.Label(think_frame, text="Computer Think Time:", 
+                font=("Arial", 12), fg='#ECF0F1', bg='#2C3E50').pack(anchor='w')
+        
+        self.think_buttons = {}
+        for seconds, label in game_ai.THINK_TIME_PRESETS:
+            think_btn = tk.Button(think_frame, text=label,
+                                 font=("Arial", 10),
+                                 fg='white', width=5,
+                                 command=lambda t=seconds: self.set_think_time(t),
+                                 relief='flat', cursor='hand2')
+            think_btn.pack(side='left', padx=2)
+            self.think_buttons[seconds] = think_btn
         
         # Reset scores button
         reset_frame = tk.Frame(settings_frame, bg='#2C3E50')
@@ -474,20 +616,56 @@ class TicTacToeGame:
                              bg='#E74C3C', fg='white',
                              command=self.reset_scores,
                              relief='flat', cursor='hand2')
-        reset_btn.pack()
+        reset_btn.pack(side='left', expand=True)
+        
+        # Computer move latency report, beside Reset so the Back button fits
+        latency_btn = tk.Button(reset_frame, text="AI Latency Stats",
+                               font=("Arial", 12),
+                               bg='#34495E', fg='white',
+                               command=self.show_latency_stats,
+                               relief='flat', cursor='hand2')
+        latency_btn.pack(side='left', expand=True)
         
         # Back button
-        back_btn = tk.Button(self.root, text="← Back to Menu",
+        back_btn = tk.Button(screen, text="← Back to Menu",
                             font=("Arial", 12),
                             bg='#95A5A6', fg='white',
                             command=self.setup_main_menu,
                             relief='flat', cursor='hand2')
         back_btn.pack(side=tk.BOTTOM, pady=20)
         
+    def update_settings_buttons(self):
+        """Recolour the settings buttons to match the current choices"""
+        for button, enabled in ((self.sound_btn, self.sounds_enabled),
+                                (self.ultimate_btn, self.ultimate_mode)):
+            button.config(text="ON" if enabled else "OFF",
+                          bg='#2ECC71' if enabled else '#E74C3C')
+        selected_size = (self.board_size, self.win_length)
+        for preset, button in self.size_buttons.items():
+            button.config(bg='#3498DB' if preset == selected_size else '#34495E')
+        for seconds, button in self.think_buttons.items():
+            button.config(bg='#3498DB' if seconds == self.think_time else '#34495E')
+        
     def toggle_sound(self):
         """Toggle sound effects"""
         self.sounds_enabled = not self.sounds_enabled
-        self.show_settings()  # Refresh to update button
+        self.update_settings_buttons()
+        
+    def toggle_ultimate(self):
+        """Switch the next game between a single board and Ultimate mode"""
+        self.ultimate_mode = not self.ultimate_mode
+        self.update_settings_buttons()
+        
+    def set_board_size(self, size, win_length):
+        """Choose the board size used by the next game"""
+        self.board_size = size
+        self.win_length = win_length
+        self.update_settings_buttons()
+        
+    def set_think_time(self, seconds):
+        """Choose how long the computer may search for each move"""
+        self.think_time = seconds
+        self.update_settings_buttons()
         
     def reset_scores(self):
         """Reset all scores"""
@@ -498,61 +676,85 @@ class TicTacToeGame:
             self.player_score = 0
             self.computer_score = 0
             self.friend_score = 0
+            self.stats.reset()
             messagebox.showinfo("Scores Reset", "All scores have been reset!")
             
+    def show_latency_stats(self):
+        """Show the computer's move latency histogram"""
+        messagebox.showinfo("AI Latency Stats", ai_stats.dump())
+            
     def show_help(self):
         """Show how to play screen"""
-        self.clear_window()
-        
-        # Header
-        header = tk.Label(self.root, text="How to Play", 
-                         font=("Arial", 20, "bold"), 
-                         fg='#ECF0F1', bg='#2C3E50')
-        header.pack(pady=20)
-        
-        # Instructions
-        instructions = [
-            "🎯 Get 3 in a row to win!",
+        self.show_screen("help")
+        for label, text in zip(self.help_labels, self.get_help_lines()):
+            label.config(text=text)
+        
+    def get_help_lines(self):
+        """Instructions for the current win length"""
+        return [
+            f"🎯 Get {self.win_length} in a row to win!",
             "",
             "📝 Rules:",
             "• Players take turns placing X's and O's",
-            "• First to get 3 in a row wins",
-            "• 3 in a row can be horizontal, vertical, or diagonal",
+            f"• First to get {self.win_length} in a row wins",
+            f"• {self.win_length} in a row can be horizontal, vertical, or diagonal",
             "• If the board fills up with no winner, it's a draw",
+            "• Ultimate mode: your cell picks the small board your",
+            "  opponent must play in; win 3 small boards in a row",
             "",
             "🎮 Game Modes:",
-            "• Play vs Computer: Choose from 3 difficulty levels",
+            "• Play vs Computer: Choose from 4 difficulty levels",
             "• Play vs Friend: Take turns on the same device",
             "",
             "🎵 Tip: Enable sound effects in settings for more fun!"
         ]
         
-        for instruction in instructions:
-            label = tk.Label(self.root, text=instruction,
+    def build_help_screen(self, screen):
+        """Create the how to play interface"""
+        # Header
+        header = tk.Label(screen, text="How to Play", 
+                         font=("Arial", 20, "bold"), 
+                         fg='#ECF0F1', bg='#2C3E50')
+        header.pack(pady=20)
+        
+        # Instructions, filled in by show_help
+        self.help_labels = []
+        for _ in self.get_help_lines():
+            label = tk.Label(screen, text="",
                            font=("Arial", 12),
                            fg='#ECF0F1', bg='#2C3E50',
                            justify='left')
             label.pack(pady=2)
+            self.help_labels.append(label)
             
         # Back button
-        back_btn = tk.Button(self.root, text="← Back to Menu",
+        back_btn = tk.Button(screen, text="← Back to Menu",
                             font=("Arial", 12),
                             bg='#95A5A6', fg='white',
                             command=self.setup_main_menu,
                             relief='flat', cursor='hand2')
         back_btn.pack(side=tk.BOTTOM, pady=20)
-        
-    def clear_window(self):
-        """Clear all widgets from the window"""
-        for widget in self.root.winfo_children():
-            widget.destroy()
             
     def run(self):
         """Start the game"""
         self.root.mainloop()
+        self.stats.close()
+        self.ai_worker.shutdown()
 
 # Run the game
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    # --profile or TICTACTOE_PROFILE: sample handlers, refreshes and AI searches
+    profiler = profiling.start_from_environment([
+        (TicTacToeGame, ("setup_main_menu", "show_difficulty_selection", "setup_game_board",
+                         "show_settings", "show_help", "player_move", "make_move",
+                         "computer_move", "finish_computer_move", "undo_move", "redo_move",
+                         "refresh_board", "update_cell_colors", "new_game", "show_screen",
+                         "build_board_grid"), "ui"),
+        (AIWorker, ("_search",), "ai"),
+    ])
     game = TicTacToeGame()
     game.run()
+    if profiler:
+        profiler.stop()
 
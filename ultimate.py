@@ -0,0 +1,381 @@
+"""Ultimate Tic-Tac-Toe: nine 3x3 boards arranged in a 3x3 meta-board.
+
+Playing in cell c of a small board sends the opponent to small board c.
+Winning a small board claims that square of the meta-board, and three
+claimed squares in a row win the game. If the target board is already
+won or full the opponent may play in any open board.
+
+The position is a nested bitboard: one 81-bit integer per player where
+small board b owns bits 9*b .. 9*b+8. The status of a small board (open,
+won by X, won by O, drawn) comes from a table indexed by its two 9-bit
+masks, and is cached per board and only recomputed for the board that
+was just played in. Front-ends address cells by (row, col) on the 9x9
+grid, so UltimateBoard offers the same interface as game_engine.Board.
+
+The AI is a UCT Monte Carlo search that plays and takes back moves on a
+single UltimateBoard with push/pop instead of copying positions.
+"""
+
+import math
+import random
+import time
+
+import game_ai
+from game_engine import FULL_MASK, WIN_MASKS, has_win, iter_bits, other
+from play_table import BASE3
+
+SUB_OPEN, SUB_X, SUB_O, SUB_DRAWN = 0, 1, 2, 3
+_WON_STATUS = {"X": SUB_X, "O": SUB_O}
+
+
+def _build_status_table():
+    """Status of every reachable pair of 9-bit masks, indexed in base 3"""
+    table = bytearray(3 ** 9)
+    for x in range(FULL_MASK + 1):
+        free = FULL_MASK & ~x
+        o = free
+        while True:
+            if has_win(x):
+                status = SUB_X
+            elif has_win(o):
+                status = SUB_O
+            elif x | o == FULL_MASK:
+                status = SUB_DRAWN
+            else:
+                status = SUB_OPEN
+            table[BASE3[x] + 2 * BASE3[o]] = status
+            if not o:
+                break
+            o = (o - 1) & free
+    return bytes(table)
+
+
+SUB_STATUS = _build_status_table()
+
+
+def sub_status(x_mask, o_mask):
+    """Look up the status of one small board from its two 9-bit masks"""
+    return SUB_STATUS[BASE3[x_mask] + 2 * BASE3[o_mask]]
+
+
+def split(row, col):
+    """Convert 9x9 (row, col) to (small board, cell within it)"""
+    return (row // 3) * 3 + col // 3, (row % 3) * 3 + col % 3
+
+
+def join(board, cell):
+    """Convert (small board, cell) back to 9x9 (row, col)"""
+    return (board // 3) * 3 + cell // 3, (board % 3) * 3 + cell % 3
+
+
+class UltimateBoard:
+    variant = "ultimate"
+    size = 9
+    win_length = 3
+
+    def __init__(self):
+        self.bits = {"X": 0, "O": 0}
+        self.reset()
+
+    def reset(self):
+        """Clear every small board"""
+        self.bits["X"] = 0
+        self.bits["O"] = 0
+        self.sub_status = [SUB_OPEN] * 9
+        self.meta = {"X": 0, "O": 0}
+        self.closed = 0
+        self.next_board = None
+        self.move_count = 0
+        self.winner = None
+        self.history = []
+        self.redo_moves = []
+
+    def copy(self):
+        """Return an independent snapshot, e.g. for a background search"""
+        board = UltimateBoard.__new__(UltimateBoard)
+        board.bits = dict(self.bits)
+        board.sub_status = self.sub_status[:]
+        board.meta = dict(self.meta)
+        board.closed = self.closed
+        board.next_board = self.next_board
+        board.move_count = self.move_count
+        board.winner = self.winner
+        board.history = self.history[:]
+        board.redo_moves = self.redo_moves[:]
+        return board
+
+    @property
+    def current_player(self):
+        """The side to move, assuming the players alternate starting with X"""
+        return "O" if self.move_count % 2 else "X"
+
+    def sub_board_of(self, row, col):
+        return split(row, col)[0]
+
+    def get(self, row, col):
+        """Return "X", "O" or "" for the given cell"""
+        board, cell = split(row, col)
+        bit = 1 << (board * 9 + cell)
+        if self.bits["X"] & bit:
+            return "X"
+        if self.bits["O"] & bit:
+            return "O"
+        return ""
+
+    def is_empty(self, row, col):
+        """Check if the given cell is free"""
+        board, cell = split(row, col)
+        return not (self.bits["X"] | self.bits["O"]) >> (board * 9 + cell) & 1
+
+    def active_boards(self):
+        """Mask of the small boards the side to move may play in"""
+        if self.winner is not None:
+            return 0
+        if self.next_board is not None and not self.closed >> self.next_board & 1:
+            return 1 << self.next_board
+        return FULL_MASK & ~self.closed
+
+    def is_legal(self, row, col):
+        """Check if the side to move may play the given cell"""
+        board, _ = split(row, col)
+        return bool(self.active_boards() >> board & 1) and self.is_empty(row, col)
+
+    def legal_cells(self):
+        """List legal moves as global bit indices (9 * board + cell)"""
+        occupied = self.bits["X"] | self.bits["O"]
+        cells = []
+        for board in iter_bits(self.active_boards()):
+            free = FULL_MASK & ~(occupied >> (board * 9))
+            cells.extend(board * 9 + cell for cell in iter_bits(free))
+        return cells
+
+    def legal_moves(self):
+        """List legal moves as 9x9 (row, col) pairs"""
+        return [join(*divmod(index, 9)) for index in self.legal_cells()]
+
+    def push_index(self, index):
+        """Play global bit index for the side to move"""
+        player = self.current_player
+        board, cell = divmod(index, 9)
+        self.history.append((index, self.next_board))
+        self.bits[player] |= 1 << index
+        self.move_count += 1
+        shift = board * 9
+        status = sub_status((self.bits["X"] >> shift) & FULL_MASK,
+                            (self.bits["O"] >> shift) & FULL_MASK)
+        if status != SUB_OPEN:
+            self.sub_status[board] = status
+            self.closed |= 1 << board
+            if status == _WON_STATUS[player]:
+                self.meta[player] |= 1 << board
+                if has_win(self.meta[player]):
+                    self.winner = player
+        self.next_board = cell
+
+    def pop_index(self):
+        """Take back the last move and return its global bit index"""
+        index, previous_next = self.history.pop()
+        board = index // 9
+        player = "X" if self.bits["X"] >> index & 1 else "O"
+        self.bits[player] &= ~(1 << index)
+        self.move_count -= 1
+        # A closed small board can only have been closed by its last move
+        if self.sub_status[board] != SUB_OPEN:
+            self.sub_status[board] = SUB_OPEN
+            self.closed &= ~(1 << board)
+            self.meta[player] &= ~(1 << board)
+        self.winner = None
+        self.next_board = previous_next
+        return index
+
+    def push(self, move):
+        """Play move, a 9x9 (row, col) pair, for the side to move"""
+        board, cell = split(*move)
+        self.push_index(board * 9 + cell)
+
+    def pop(self):
+        """Take back the last pushed move and return it"""
+        return join(*divmod(self.pop_index(), 9))
+
+    def play(self, move):
+        """Push a new move from a player, discarding any undone moves"""
+        self.push(move)
+        self.redo_moves.clear()
+
+    def can_undo(self):
+        return bool(self.history)
+
+    def can_redo(self):
+        return bool(self.redo_moves)
+
+    def undo(self):
+        """Take back the last move, keeping it for redo"""
+        move = self.pop()
+        self.redo_moves.append(move)
+        return move
+
+    def redo(self):
+        """Replay the most recently undone move"""
+        move = self.redo_moves.pop()
+        self.push(move)
+        return move
+
+    def check_winner(self):
+        """Return the winning player, or None"""
+        return self.winner
+
+    def winning_line(self):
+        """Centre cells of the first and last won small boards of the winning line"""
+        if self.winner is None:
+            return None
+        meta = self.meta[self.winner]
+        for mask in WIN_MASKS:
+            if meta & mask == mask:
+                boards = list(iter_bits(mask))
+                return join(boards[0], 4), join(boards[-1], 4)
+        return None
+
+    def is_full(self):
+        """Check if every small board is won or full"""
+        return self.closed == FULL_MASK
+
+
+class Node:
+    """A move in the search tree; value is scored for the player who made it"""
+
+    __slots__ = ("index", "player", "parent", "children", "untried", "visits", "value")
+
+    def __init__(self, index, player, parent, untried):
+        self.index = index
+        self.player = player
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.value = 0.0
+
+
+class UltimateMCTS:
+    """UCT search kept between moves so the tree can be reused"""
+
+    def __init__(self, exploration=1.4):
+        self.exploration = exploration
+        self.root = None
+        self.root_history = None
+        self.iterations = 0
+
+    def _find_root(self, board):
+        """Descend the old tree along the moves played since the last search"""
+        history = [index for index, _ in board.history]
+        if self.root is not None and history[:len(self.root_history)] == self.root_history:
+            node = self.root
+            for index in history[len(self.root_history):]:
+                node = next((child for child in node.children if child.index == index), None)
+                if node is None:
+                    break
+            if node is not None:
+                node.parent = None
+                return node, history
+        return Node(None, other(board.current_player), None, board.legal_cells()), history
+
+    def search(self, board, iterations=None, time_budget=None, should_stop=None):
+        """Return the most visited global move index from board's position"""
+        if iterations is None and time_budget is None:
+            time_budget = game_ai.DEFAULT_THINK_TIME
+        deadline = time.monotonic() + time_budget if time_budget is not None else None
+        state = board.copy()
+        state.redo_moves = []
+        root, history = self._find_root(state)
+        self.root, self.root_history = root, history
+
+        count = 0
+        while iterations is None or count < iterations:
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            if should_stop is not None and should_stop():
+                raise game_ai.SearchAborted
+            self._iterate(root, state)
+            count += 1
+        self.iterations = count
+        game_ai.search_stats.reset()
+        game_ai.search_stats.nodes = count
+
+        if not root.children:
+            return random.choice(root.untried)
+        return max(root.children, key=lambda child: child.visits).index
+
+    def _iterate(self, root, state):
+        """Select, expand, play out and back up, then restore state"""
+        node = root
+        pushed = 0
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(node.children, key=lambda child: child.value / child.visits
+                       + self.exploration * math.sqrt(log_visits / child.visits))
+            state.push_index(node.index)
+            pushed += 1
+
+        if node.untried and state.winner is None:
+            index = node.untried.pop(random.randrange(len(node.untried)))
+            player = state.current_player
+            state.push_index(index)
+            pushed += 1
+            child = Node(index, player, node, state.legal_cells())
+            node.children.append(child)
+            node = child
+
+        while True:
+            moves = state.legal_cells()
+            if not moves:
+                break
+            state.push_index(random.choice(moves))
+            pushed += 1
+        winner = state.winner
+        for _ in range(pushed):
+            state.pop_index()
+
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.value += 0.5
+            elif winner == node.player:
+                node.value += 1.0
+            node = node.parent
+
+
+_searcher = UltimateMCTS()
+
+
+def get_best_move(board, iterations=None, time_budget=None, should_stop=None):
+    """Get the side to move's move, taking a game-winning move directly"""
+    if board.winner is not None or board.is_full():
+        return None
+    player = board.current_player
+    state = board.copy()
+    for index in state.legal_cells():
+        state.push_index(index)
+        won = state.winner == player
+        state.pop_index()
+        if won:
+            return join(*divmod(index, 9))
+    index = _searcher.search(board, iterations, time_budget, should_stop)
+    return join(*divmod(index, 9))
+
+
+def choose_move(board, difficulty, should_stop=None, time_budget=None):
+    """Pick the computer's move for one of game_ai.DIFFICULTIES"""
+    if time_budget is None:
+        time_budget = game_ai.DEFAULT_THINK_TIME
+    moves = board.legal_moves()
+    if not moves:
+        return None
+    if difficulty == "random":
+        return random.choice(moves)
+    if difficulty == "easy":
+        if random.random() < 0.3:
+            return get_best_move(board, time_budget=time_budget / 4,
+                                 should_stop=should_stop)
+        return random.choice(moves)
+    if difficulty == "medium":
+        return get_best_move(board, time_budget=time_budget / 4, should_stop=should_stop)
+    return get_best_move(board, time_budget=time_budget, should_stop=should_stop)